@@ -0,0 +1,330 @@
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import shutil
+import string
+import tempfile
+import time
+import tracemalloc
+
+import buddies
+import profiling
+import topk
+
+
+def generate_time_spent(file_name, num_users, seed=0, max_time=10000000, skew=0.0):
+    """
+    this function writes a timeSpent file of num_users lines of user id:time spent, with user ids 1 to num_users in a
+    shuffled order. Each time spent is max_time * r ** (1 + skew) for a uniform random r, so a larger skew makes small
+    times more common and large times rarer.
+    :param file_name:
+    :param num_users:
+    :param seed: seed of the random generator
+    :param max_time: largest possible time spent
+    :param skew: non-negative skew of the time spent towards 0
+    :return: none
+    :time complexity: O(N) where N is the number of users
+    :space complexity: O(N) where N is the number of users
+    """
+    generator = random.Random(seed)
+    user_ids = list(range(1, num_users + 1))
+    generator.shuffle(user_ids)
+    file = open(file_name, "w")
+    for user_id in user_ids:
+        file.write("{}:{}\n".format(user_id, int(max_time * generator.random() ** (1 + skew))))
+    file.close()
+
+
+def generate_titles(num_movies, title_length, generator):
+    """
+    this function makes num_movies distinct movie names of uppercase letters and single spaces, each title_length
+    characters long, which is the alphabet the radix sorts in buddies can handle.
+    :param num_movies:
+    :param title_length:
+    :param generator: random generator
+    :raises: ValueError if title_length is too short for num_movies distinct names
+    :return: list of movie names
+    :time complexity: O(MC) where M is the number of movies and C is title_length
+    :space complexity: O(MC) where M is the number of movies and C is title_length
+    """
+    if title_length < 1 or 26 ** title_length < 2 * num_movies:
+        raise ValueError("title length too short for {} movies".format(num_movies))
+    titles = set()
+    while len(titles) < num_movies:
+        characters = []
+        for i in range(title_length):
+            if 0 < i < title_length - 1 and characters[-1] != " " and generator.random() < 0.15:
+                characters.append(" ")
+            else:
+                characters.append(generator.choice(string.ascii_uppercase))
+        titles.add("".join(characters))
+    return sorted(titles)
+
+
+def generate_favorite_movies(file_name, num_users, num_movies=50, min_movies=1, max_movies=10,
+                             list_distribution="uniform", title_length=12, skew=1.0, seed=0):
+    """
+    this function writes a favoriteMovies file of num_users lines of user id:movie,movie,... Each user likes between
+    min_movies and max_movies distinct movies. With the "uniform" list distribution every length is equally likely, and
+    with the "geometric" distribution each extra movie is half as likely, so most lists are short and a few are long.
+    Movies are picked with Zipf weights 1 / rank ** skew, so a skew of 0 makes every movie equally popular and a larger
+    skew makes a few movies much more popular, which gives more users with the same movies. The cumulative weights are
+    computed once, so each pick is a binary search instead of summing every weight again.
+    :param file_name:
+    :param num_users:
+    :param num_movies: number of distinct movies
+    :param min_movies: smallest number of movies liked by a user
+    :param max_movies: largest number of movies liked by a user
+    :param list_distribution: "uniform" or "geometric"
+    :param title_length: number of characters of each movie name
+    :param skew: Zipf exponent of movie popularity
+    :param seed: seed of the random generator
+    :raises: ValueError if the list lengths or distribution are invalid
+    :return: none
+    :time complexity: O(UK(K + log M) + MC) where U is the number of users, K is max_movies, M is the number of movies
+    and C is title_length
+    :space complexity: O(MC) where M is the number of movies and C is title_length
+    """
+    if not 1 <= min_movies <= max_movies <= num_movies:
+        raise ValueError("invalid number of movies per user")
+    if list_distribution not in ("uniform", "geometric"):
+        raise ValueError("invalid list distribution")
+    generator = random.Random(seed)
+    titles = generate_titles(num_movies, title_length, generator)
+    popularity = list(range(num_movies))
+    generator.shuffle(popularity)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) ** skew for rank in range(num_movies)))
+    ranks = range(num_movies)
+    file = open(file_name, "w")
+    for user_id in range(1, num_users + 1):
+        if list_distribution == "uniform":
+            num_liked = generator.randint(min_movies, max_movies)
+        else:
+            num_liked = min_movies
+            while num_liked < max_movies and generator.random() < 0.5:
+                num_liked += 1
+        liked = []
+        chosen = set()
+        while len(liked) < num_liked:
+            movie = popularity[generator.choices(ranks, cum_weights=cum_weights)[0]]
+            if movie not in chosen:
+                chosen.add(movie)
+                liked.append(titles[movie])
+        file.write("{}:{}\n".format(user_id, ",".join(liked)))
+    file.close()
+
+
+def time_stages(stages):
+    """
+    this function runs each stage in order and times it. Each stage is given the result of the stage before it.
+    Anything a stage prints is captured instead of written to the terminal, so that printing does not dominate.
+    :param stages: list of (name, function of one argument)
+    :return: a tuple of (dictionary of stage name to seconds, the result of the last stage)
+    :time complexity: the sum of the stages' time complexities
+    :space complexity: the largest of the stages' space complexities
+    """
+    seconds = {}
+    result = None
+    for name, stage in stages:
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = stage(result)
+        seconds[name] = time.perf_counter() - started
+    return seconds, result
+
+
+def topk_stages(file_name, k):
+    """
+    this function returns the stages of topk.get_topk_users: reading the file, heapifying the users, and taking the
+    maximum k times with topk.get_max.
+    :param file_name:
+    :param k: number of users to take
+    :return: list of (name, function of one argument)
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    def extract(data_heap):
+        count = len(data_heap)
+        if not 1 <= k <= count - 1:
+            raise ValueError("invalid input for k")
+        for x in range(1, k + 1):
+            topk.get_max(data_heap, count - x, x)
+        return data_heap
+
+    return [("read", lambda _: topk.read_in_data(file_name)),
+            ("heapify", topk.heapify),
+            ("extract", extract)]
+
+
+def buddies_stages(file_name):
+    """
+    this function returns the stages of buddies.group_users_by_movies with the radix engine: reading the file, padding
+    each user's movies, sorting each user's movies, removing the padding, concatenating each user's movies, radix
+    sorting the concatenated movies, and grouping.
+    :param file_name:
+    :return: list of (name, function of one argument)
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    state = {}
+
+    def read(_):
+        data = buddies.read_in_data(file_name)
+        state["max_characters"] = data.pop()
+        return data
+
+    def pad(data):
+        buddies.padding_users_movies(data)
+        return data
+
+    def sort(data):
+        return buddies.sort_users_movies(data)
+
+    def unpad(data):
+        buddies.remove_padding_of_movies(data)
+        return data
+
+    def concatenate(data):
+        buddies.concatenate_and_pad_user_movies(data, state["max_characters"])
+        return data
+
+    def global_sort(data):
+        return buddies.radix_sort_concatenated_movies(data, state["max_characters"])
+
+    def group(data):
+        buddies.group_and_print_movie_buddies(data)
+        return data
+
+    return [("read", read), ("pad", pad), ("sort", sort), ("unpad", unpad), ("concatenate", concatenate),
+            ("global_sort", global_sort), ("group", group)]
+
+
+def measure(name, stages, file_name, num_users, repeats, memory, counters=False):
+    """
+    this function times a pipeline of stages, keeping the best time of each stage over the given number of repeats, and
+    reports the total time, the throughput in users and bytes per second and, if memory is True, the peak memory
+    allocated by Python during one more run traced by tracemalloc. If counters is True, one more run is made inside
+    profiling.profile and its counters are reported.
+    :param name: name of the pipeline
+    :param stages: function that returns a fresh list of stages
+    :param file_name: input file of the pipeline
+    :param num_users: number of users in the input file
+    :param repeats: number of timed runs
+    :param memory: whether to measure peak memory
+    :param counters: whether to report the profiling counters
+    :return: dictionary of the results
+    :time complexity: O(R T) where R is the number of repeats and T is the time complexity of the pipeline
+    :space complexity: the space complexity of the pipeline
+    """
+    best = {}
+    for _ in range(repeats):
+        seconds, _ = time_stages(stages())
+        for stage in seconds:
+            if stage not in best or seconds[stage] < best[stage]:
+                best[stage] = seconds[stage]
+    total = sum(best.values())
+    file_size = os.path.getsize(file_name)
+    result = {"pipeline": name, "users": num_users, "bytes": file_size, "stages": best, "total_seconds": total,
+              "users_per_second": num_users / total if total else None,
+              "bytes_per_second": file_size / total if total else None}
+    if memory:
+        tracemalloc.start()
+        time_stages(stages())
+        result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if counters:
+        with profiling.profile() as stats:
+            time_stages(stages())
+        result["counters"] = stats.to_dict()
+    return result
+
+
+def run_benchmarks(num_users, k, num_movies=50, min_movies=1, max_movies=10, list_distribution="uniform",
+                   title_length=12, skew=1.0, time_skew=0.0, seed=0, repeats=3, memory=True, work_dir=None,
+                   counters=False):
+    """
+    this function generates a timeSpent file and a favoriteMovies file with the given parameters, and measures both
+    pipelines on them with measure.
+    :param num_users: number of users in each file
+    :param k: number of users taken by the topk pipeline
+    :param num_movies: number of distinct movies
+    :param min_movies: smallest number of movies liked by a user
+    :param max_movies: largest number of movies liked by a user
+    :param list_distribution: "uniform" or "geometric"
+    :param title_length: number of characters of each movie name
+    :param skew: Zipf exponent of movie popularity
+    :param time_skew: skew of the time spent towards 0
+    :param seed: seed of the random generator
+    :param repeats: number of timed runs of each pipeline
+    :param memory: whether to measure peak memory
+    :param work_dir: directory for the generated files, or None for a temporary directory that is removed afterwards
+    :param counters: whether to report the profiling counters
+    :return: dictionary of the parameters and the results of both pipelines
+    :time complexity: O(R(N log N + UCK)) where R is the number of repeats, N and U are the number of users, C is the
+    maximum number of characters for any movie, and K is the maximum number of movies liked by a user
+    :space complexity: O(N + UCK) where N and U are the number of users, C is the maximum number of characters for any
+    movie, and K is the maximum number of movies liked by a user
+    """
+    parameters = {"users": num_users, "k": k, "movies": num_movies, "min_movies": min_movies,
+                  "max_movies": max_movies, "list_distribution": list_distribution, "title_length": title_length,
+                  "skew": skew, "time_skew": time_skew, "seed": seed, "repeats": repeats}
+    temporary = work_dir is None
+    if temporary:
+        work_dir = tempfile.mkdtemp(prefix="topk-bench-")
+    try:
+        time_file = os.path.join(work_dir, "timeSpent.txt")
+        movie_file = os.path.join(work_dir, "favoriteMovies.txt")
+        generate_time_spent(time_file, num_users, seed, skew=time_skew)
+        generate_favorite_movies(movie_file, num_users, num_movies, min_movies, max_movies, list_distribution,
+                                 title_length, skew, seed)
+        results = [measure("topk", lambda: topk_stages(time_file, k), time_file, num_users, repeats, memory,
+                           counters),
+                   measure("buddies", lambda: buddies_stages(movie_file), movie_file, num_users, repeats, memory,
+                           counters)]
+    finally:
+        if temporary:
+            shutil.rmtree(work_dir)
+    return {"parameters": parameters, "results": results}
+
+
+def main(argv=None):
+    """
+    this function parses the command line arguments, runs the benchmarks and writes the results as JSON.
+    :param argv: list of arguments, or None for sys.argv
+    :return: none
+    """
+    parser = argparse.ArgumentParser(description="Benchmark topk.py and buddies.py on generated data.")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--movies", type=int, default=50)
+    parser.add_argument("--min-movies", type=int, default=1)
+    parser.add_argument("--max-movies", type=int, default=10)
+    parser.add_argument("--list-distribution", choices=["uniform", "geometric"], default="uniform")
+    parser.add_argument("--title-length", type=int, default=12)
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of movie popularity")
+    parser.add_argument("--time-skew", type=float, default=0.0, help="skew of the time spent towards 0")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="do not measure peak memory")
+    parser.add_argument("--counters", action="store_true", help="also report profiling counters")
+    parser.add_argument("--work-dir", help="keep the generated files in this directory")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+    results = run_benchmarks(args.users, args.k, args.movies, args.min_movies, args.max_movies, args.list_distribution,
+                             args.title_length, args.skew, args.time_skew, args.seed, args.repeats,
+                             not args.no_memory, args.work_dir, args.counters)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        file = open(args.output, "w")
+        file.write(output + "\n")
+        file.close()
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,9 @@
+import sys
+from array import array
+from multiprocessing import Pool
+
+# buckets of msd_radix_sort with at most this many keys are sorted by comparison instead of being split
+MSD_BURST_SIZE = 32
 
 
 def read_in_data(file_name):
@@ -73,11 +79,15 @@ def padding_users_movies(users_list):
             user_data[j] = [movie_name, movie_name_length]
 
 
-def sort_users_movies(users_list):
+def sort_users_movies(users_list, processes=1):
     """
     This function sorts each user's movies alphabetically by calling the radix_sort_users_movies function U times,
-    where U is the number of users.
+    where U is the number of users. If processes is more than 1, the users are split into batches that are sorted by a
+    pool of worker processes with radix_sort_users_movies_batch. Each batch is sent as one encoded string instead of
+    nested lists, and only the sorted order of each user's movies is sent back, which is used to reorder the user's
+    movies in place.
     :param users_list:
+    :param processes: number of worker processes
     :return: list of users movies where the movies are sorted alphabetically.
     :time complexity: O(UCK) where U is the number of users, C is the maximum number of characters for any movie, and K
     is the maximum number of movies liked by a user.
@@ -85,6 +95,32 @@ def sort_users_movies(users_list):
     is the maximum number of movies liked by a user.
     """
     number_of_users = len(users_list)
+    if processes > 1 and number_of_users > 0:
+        batch_size = -(-number_of_users // (processes * 4))
+        batches = []
+        for start in range(0, number_of_users, batch_size):
+            batches.append(encode_users_movies(users_list, start, min(start + batch_size, number_of_users)))
+        pool = Pool(processes)
+        try:
+            sorted_orders = pool.map(radix_sort_users_movies_batch, batches)
+        finally:
+            pool.close()
+            pool.join()
+        x = 0
+        for batch_order in sorted_orders:
+            order = array("i")
+            order.frombytes(batch_order)
+            position = 0
+            while position < len(order):
+                user_data = users_list[x]
+                num_of_movies = len(user_data) - 1
+                sorted_user_movies = [user_data[0]]
+                for i in range(position, position + num_of_movies):
+                    sorted_user_movies.append(user_data[order[i] + 1])
+                users_list[x] = sorted_user_movies
+                position += num_of_movies
+                x += 1
+        return users_list
     for x in range(number_of_users):
         user_id = users_list[x][0]
         sorted_user_movies = radix_sort_users_movies(users_list[x], user_id)
@@ -92,6 +128,55 @@ def sort_users_movies(users_list):
     return users_list
 
 
+def encode_users_movies(users_list, start, end):
+    """
+    this function encodes the padded movies of the users from position start up to but not including position end as
+    one string, with one line per user and the movies of a user separated by commas. This is much cheaper to send to a
+    worker process than the users' nested lists.
+    :param users_list:
+    :param start: position of the first user
+    :param end: position after the last user
+    :return: the encoded batch
+    :time complexity: O(BCK) where B is the number of users in the batch, C is the maximum number of characters for any
+    movie, and K is the maximum number of movies liked by a user.
+    :space complexity: O(BCK) where B is the number of users in the batch, C is the maximum number of characters for
+    any movie, and K is the maximum number of movies liked by a user.
+    """
+    lines = []
+    for x in range(start, end):
+        user_data = users_list[x]
+        movies = []
+        for j in range(1, len(user_data)):
+            movies.append(user_data[j][0])
+        lines.append(",".join(movies))
+    return "\n".join(lines)
+
+
+def radix_sort_users_movies_batch(encoded_batch):
+    """
+    this function is run by each worker process. It decodes a batch made by encode_users_movies and sorts each user's
+    movies with radix_sort_users_movies. Each movie is paired with its position in the user's list, so after sorting
+    the positions give the sorted order of the user's movies. The sorted orders of all the users are returned as the
+    bytes of one int array.
+    :param encoded_batch:
+    :return: the sorted positions of every user's movies, one user after another
+    :time complexity: O(BCK) where B is the number of users in the batch, C is the maximum number of characters for any
+    movie, and K is the maximum number of movies liked by a user.
+    :space complexity: O(BCK) where B is the number of users in the batch, C is the maximum number of characters for
+    any movie, and K is the maximum number of movies liked by a user.
+    """
+    order = array("i")
+    for line in encoded_batch.split("\n"):
+        movies = line.split(",")
+        user_data = [None]
+        for j in range(len(movies)):
+            user_data.append([movies[j], j])
+        user_data = radix_sort_users_movies(user_data, None)
+        for j in range(1, len(user_data)):
+            order.append(user_data[j][1])
+    return order.tobytes()
+
+
 def radix_sort_users_movies(my_list, user_id):
     """
     this function sorts each user's movies alphabetically with the least significant digit(LSD) radix sort. It uses
@@ -268,6 +353,96 @@ def radix_sort_concatenated_movies(users_list, max_char):
     return users_list
 
 
+def msd_radix_sort(items, key):
+    """
+    this function sorts items by a bytes key with the most significant digit (MSD) radix sort, so strings do not need
+    to be padded to the same length. Items whose keys share a prefix are put into one of 257 buckets by the byte after
+    the prefix, where bucket 0 holds the keys that end at the prefix and bucket b + 1 holds the keys whose next byte is
+    b, so any byte value can be sorted and a shorter key comes before a longer key with the same prefix. Only buckets
+    with more than one key are split further, so each key is only looked at up to the prefix that distinguishes it. Like
+    a burst trie, a bucket with at most MSD_BURST_SIZE keys is not split but sorted directly by comparison. The sort is
+    stable, and an explicit stack is used instead of recursion so long shared prefixes do not hit the recursion limit.
+    :param items: list of items
+    :param key: function from an item to its bytes key
+    :return: a new list of the items sorted by their keys
+    :time complexity: O(D + N) where D is the total length of the distinguishing prefixes and N is the number of items
+    :space complexity: O(N + L) where N is the number of items and L is the total length of the keys
+    """
+    keys = []
+    for item in items:
+        keys.append(key(item))
+    output = []
+    stack = [(list(range(len(items))), 0)]
+    while stack:
+        group, depth = stack.pop()
+        if depth < 0 or len(group) <= MSD_BURST_SIZE:
+            if depth >= 0:
+                group.sort(key=keys.__getitem__)
+            for i in group:
+                output.append(items[i])
+            continue
+        buckets = {}
+        ended = []
+        for i in group:
+            item_key = keys[i]
+            if depth < len(item_key):
+                byte = item_key[depth]
+                if byte in buckets:
+                    buckets[byte].append(i)
+                else:
+                    buckets[byte] = [i]
+            else:
+                ended.append(i)
+        for byte in sorted(buckets, reverse=True):
+            stack.append((buckets[byte], depth + 1))
+        if ended:
+            stack.append((ended, -1))
+    return output
+
+
+def sort_users_movies_msd(users_list):
+    """
+    this function sorts each user's movies from read_in_data with msd_radix_sort on their utf-8 bytes, without padding.
+    It removes the maximum number of characters for a movie stored at the end of each user's list, and appends a key
+    for msd_radix_sort_users instead: the utf-8 bytes of radix_order_key of the user's sorted movies, followed by a 0
+    byte and the movies joined by 1 bytes. The first part gives the same order as radix_sort_concatenated_movies and
+    group_movie_buddies_hash, and the joined movies make sure only users with exactly the same movies have the same key
+    and put users whose movies concatenate to the same string in order of their tuples of movies.
+    :param users_list: list of users from read_in_data, without the maximum number of characters at the end
+    :return: none
+    :time complexity: O(UCK) where U is the number of users, C is the maximum number of characters for any movie, and K
+    is the maximum number of movies liked by a user.
+    :space complexity: O(UCK) where U is the number of users, C is the maximum number of characters for any movie, and K
+    is the maximum number of movies liked by a user.
+    """
+    for x in range(len(users_list)):
+        user_data = users_list[x]
+        user_data.pop()
+        movies = []
+        for j in range(1, len(user_data)):
+            movies.append(user_data[j][0].encode("utf-8"))
+        movies = msd_radix_sort(movies, bytes)
+        sorted_user_movies = [user_data[0]]
+        for movie in movies:
+            sorted_user_movies.append(movie.decode("utf-8"))
+        order_key = radix_order_key(sorted_user_movies[1:]).encode("utf-8")
+        sorted_user_movies.append(order_key + b"\x00" + b"\x01".join(movies))
+        users_list[x] = sorted_user_movies
+
+
+def msd_radix_sort_users(users_list):
+    """
+    this function sorts the users by the key appended by sort_users_movies_msd with msd_radix_sort.
+    :param users_list:
+    :return: a list of the users sorted by their keys
+    :time complexity: O(D + U) where D is the total length of the distinguishing prefixes of the keys and U is the
+    number of users
+    :space complexity: O(UCK) where U is the number of users, C is the maximum number of characters for any movie, and K
+    is the maximum number of movies liked by a user.
+    """
+    return msd_radix_sort(users_list, lambda user_data: user_data[-1])
+
+
 def group_and_print_movie_buddies(sorted_list):
     """
     this function does a linear scan of the sorted list, and if the concatenated string of favourite movies are the
@@ -313,19 +488,268 @@ def group_and_print_movie_buddies(sorted_list):
                 j += 1
 
 
-def group_users_by_movies():
+def read_in_data_canonical(file_name, start=0):
+    """
+    this function reads in the data stored in the given file one user at a time. Each user's movies are canonicalized
+    into a tuple of movie names sorted alphabetically, so that two users like exactly the same movies if and only if
+    their tuples are equal. Movie names are interned, so users that like the same movie share one string.
+    :param file_name:
+    :param start: byte offset of the first line to read
+    :return: a generator of (user id, tuple of sorted movie names)
+    :time complexity: O(UK log K) where U is the number of users and K is the maximum number of movies liked by a user.
+    :space complexity: O(CK) where C is the maximum number of characters for any movie, and K is the maximum number of
+    movies liked by a user.
+    """
+    file = open(file_name)
+    if start:
+        file.seek(start)
+    for line in file:
+        line = line.strip()
+        line = line.split(":")
+        user_id = int(line[0])
+        movies = line[1].split(",")
+        for i in range(len(movies)):
+            movies[i] = sys.intern(movies[i])
+        movies.sort()
+        yield user_id, tuple(movies)
+    file.close()
+
+
+def read_in_data_interned(file_name):
+    """
+    this function reads in the data stored in the given file in a single pass, and builds a dictionary of every distinct
+    movie name. Once the file has been read, the movie names are sorted alphabetically and each one is given an integer
+    id equal to its position, so comparing two ids is the same as comparing the two names. Each user's movies are then
+    stored as a sorted array of ids instead of strings. The users' ids are sorted all at once with a counting sort:
+    every (user, movie) pair is put into the bucket of its movie id, and the buckets are emptied in order of movie id,
+    so each user's movies come out sorted.
+    :param file_name:
+    :return: a tuple of (list of movie names indexed by movie id, list of (user id, array of sorted movie ids))
+    :time complexity: O(UK + M log M) where U is the number of users, K is the maximum number of movies liked by a user,
+    and M is the number of distinct movies.
+    :space complexity: O(UK + MC) where U is the number of users, K is the maximum number of movies liked by a user, M
+    is the number of distinct movies, and C is the maximum number of characters for any movie.
+    """
+    file = open(file_name)
+    first_seen = {}
+    users = []
+    for line in file:
+        line = line.strip()
+        line = line.split(":")
+        user_id = int(line[0])
+        movies = line[1].split(",")
+        movie_ids = array("i")
+        for movie in movies:
+            if movie not in first_seen:
+                first_seen[movie] = len(first_seen)
+            movie_ids.append(first_seen[movie])
+        users.append((user_id, movie_ids))
+    file.close()
+    titles = sorted(first_seen)
+    new_id = array("i", bytes(4 * len(titles)))
+    for i in range(len(titles)):
+        new_id[first_seen[titles[i]]] = i
+    buckets = [[] for _ in range(len(titles))]
+    for u in range(len(users)):
+        movie_ids = users[u][1]
+        for movie_id in movie_ids:
+            buckets[new_id[movie_id]].append(u)
+        del movie_ids[:]
+    for movie_id in range(len(buckets)):
+        for u in buckets[movie_id]:
+            users[u][1].append(movie_id)
+    return titles, users
+
+
+def radix_order_key(movies):
+    """
+    this function returns a string that sorts in the same order as radix_sort_concatenated_movies sorts the user's
+    concatenated movies. That sort treats whitespace and the "@" padding as the same character, which comes before A,
+    so whitespace is replaced with "@" and the trailing "@" characters are removed. Other characters, such as digits
+    and punctuation, are not supported by radix_sort_concatenated_movies and sort by their code points, which every
+    engine except the radix engine uses.
+    :param movies: tuple of sorted movie names
+    :return: the sort key
+    :time complexity: O(CK) where C is the maximum number of characters for any movie, and K is the maximum number of
+    movies liked by a user.
+    :space complexity: O(CK) where C is the maximum number of characters for any movie, and K is the maximum number of
+    movies liked by a user.
+    """
+    return "".join(movies).replace(" ", "@").rstrip("@")
+
+
+def group_movie_buddies_hash(users, titles=None):
+    """
+    this function groups users that like exactly the same movies by using each user's canonical tuple of movies as the
+    key of a dictionary, instead of padding and radix sorting every user's movies. Only groups with at least two users
+    are kept, and the groups are put in the same order as group_and_print_movie_buddies prints them. Groups whose
+    movies concatenate to the same string are put in order of their tuples of movies, as msd_radix_sort_users and
+    buddies_stream.group_movie_buddies_stream do. The user ids in a group are in the order they were read in. If
+    titles is given, the users' movies are sorted movie ids from read_in_data_interned, and the ids are turned back
+    into movie names for the groups that are kept.
+    :param users: iterable of (user id, sorted movies), such as read_in_data_canonical or read_in_data_interned
+    :param titles: list of movie names indexed by movie id, or None if the users' movies are movie names
+    :return: list of (tuple of sorted movie names, list of user ids)
+    :time complexity: O(UCK + G log G) where U is the number of users, C is the maximum number of characters for any
+    movie, K is the maximum number of movies liked by a user, and G is the number of groups.
+    :space complexity: O(UK) where U is the number of users, and K is the maximum number of movies liked by a user.
+    """
+    groups = {}
+    for user_id, movies in users:
+        movies = tuple(movies)
+        if movies in groups:
+            groups[movies].append(user_id)
+        else:
+            groups[movies] = [user_id]
+    buddy_groups = []
+    for movies in groups:
+        if len(groups[movies]) > 1:
+            if titles is None:
+                buddy_groups.append((movies, groups[movies]))
+            else:
+                buddy_groups.append((tuple(titles[movie_id] for movie_id in movies), groups[movies]))
+    buddy_groups.sort(key=lambda group: (radix_order_key(group[0]), group[0]))
+    return buddy_groups
+
+
+def print_movie_buddies(buddy_groups):
+    """
+    this function prints the group number, the names of the movies they like, and the user ids of the people who like
+    the exact same movies, in the same format as group_and_print_movie_buddies.
+    :param buddy_groups: iterable of (tuple of sorted movie names, list of user ids)
+    :return: none
+    :time complexity: O(UCK) where U is the number of users, C is the maximum number of characters for any movie, and K
+    is the maximum number of movies liked by a user.
+    :space complexity: O(CK) where C is the maximum number of characters for any movie, and K is the maximum number of
+    movies liked by a user.
+    """
+    group_num = 0
+    for movies, buddies in buddy_groups:
+        group_num += 1
+        print("GROUP {}".format(group_num))
+        print("Movies: {}".format(",".join(movies)))
+        print("Buddies: {}\n".format(",".join(str(user_id) for user_id in buddies)))
+
+
+def find_movie_buddies(sorted_list):
+    """
+    this function does the same linear scan of the sorted list as group_and_print_movie_buddies, but returns the groups
+    instead of printing them.
+    :param sorted_list:
+    :return: list of (tuple of sorted movie names, list of user ids)
+    :time complexity: O(UCK) where U is the number of users, C is the maximum number of characters for any movie, and K
+    is the maximum number of movies liked by a user.
+    :space complexity: O(UK) where U is the number of users, and K is the maximum number of movies liked by a user.
+    """
+    num_users = len(sorted_list)
+    buddy_groups = []
+    i = 0
+    while i < num_users:
+        y = i + 1
+        while (y < num_users) and (sorted_list[i][-1] == sorted_list[y][-1]):
+            y += 1
+        if y - i > 1:
+            buddies = []
+            for x in range(i, y):
+                buddies.append(sorted_list[x][0])
+            buddy_groups.append((tuple(sorted_list[i][1:-1]), buddies))
+        i = y
+    return buddy_groups
+
+
+def find_buddy_groups(file_name, engine="hash", processes=1):
+    """
+    this function groups the users of the given file that like exactly the same movies without printing them. The
+    "radix" engine runs the padding and radix sort pipeline, the "hash" engine calls group_movie_buddies_hash on the
+    interned movie ids, the "stream" engine calls buddies_stream.group_movie_buddies_stream, and the "msd" engine sorts
+    each user's movies and then the users with msd_radix_sort, without padding. The "cached" engine loads the groups of
+    the file's contents from a result_cache.ResultCache in the user's cache directory, which only reads the lines
+    appended since the groups were stored, if any.
+    :param file_name:
+    :param engine: "radix", "msd", "hash", "stream" or "cached"
+    :param processes: number of worker processes used by the "radix" engine to sort each user's movies
+    :raises: ValueError if the engine is not recognised.
+    :return: an iterable of (tuple of sorted movie names, list of user ids)
+    :time complexity: O(UCK) where U is the number of users, C is the maximum number of characters for any movie, and K
+    is the maximum number of movies liked by a user.
+    :space complexity: O(UCK) where U is the number of users, C is the maximum number of characters for any movie, and K
+    is the maximum number of movies liked by a user.
+    """
+    if engine == "hash":
+        titles, users = read_in_data_interned(file_name)
+        return group_movie_buddies_hash(users, titles)
+    elif engine == "stream":
+        from buddies_stream import group_movie_buddies_stream
+        return group_movie_buddies_stream(file_name)
+    elif engine == "msd":
+        data = read_in_data(file_name)
+        data.pop()
+        sort_users_movies_msd(data)
+        return find_movie_buddies(msd_radix_sort_users(data))
+    elif engine == "radix":
+        data = read_in_data(file_name)
+        max_characters = data.pop()
+        padding_users_movies(data)
+        sort_users_movies(data, processes)
+        remove_padding_of_movies(data)
+        concatenate_and_pad_user_movies(data, max_characters)
+        data = radix_sort_concatenated_movies(data, max_characters)
+        return find_movie_buddies(data)
+    elif engine == "cached":
+        from result_cache import ResultCache
+        return ResultCache().get_buddy_groups(file_name)
+    raise ValueError("invalid engine")
+
+
+def iter_movie_buddies(file_name, engine="hash", processes=1):
+    """
+    this function groups the users of the given file with find_buddy_groups and returns the groups as records.
+    :param file_name:
+    :param engine: see find_buddy_groups
+    :param processes: see find_buddy_groups
+    :raises: ValueError if the engine is not recognised.
+    :return: a generator of dictionaries with the keys "group", "movies" and "buddies"
+    :time complexity: see find_buddy_groups
+    :space complexity: see find_buddy_groups
+    """
+    group_num = 0
+    for movies, buddies in find_buddy_groups(file_name, engine, processes):
+        group_num += 1
+        yield {"group": group_num, "movies": list(movies), "buddies": buddies}
+
+
+def group_users_by_movies(engine="radix", processes=1):
     """
-    this function calls the above functions to execute the algorithm.
+    this function calls the above functions to execute the algorithm. The "radix" engine pads and radix sorts every
+    user's movies. The "hash" engine gives each movie an integer id with read_in_data_interned and groups the users'
+    sorted tuples of movie ids in a dictionary, which does not depend on the length of the longest concatenated movie
+    string. The "stream" engine calls buddies_stream.group_movie_buddies_stream, which reads the users in batches and
+    spills sorted runs to disk so that files larger than memory can be grouped. The "similar" engine calls
+    buddies_similarity.group_similar_buddies, which also groups users whose movies are not exactly the same but have a
+    Jaccard similarity of at least 0.7. The "msd" engine sorts with msd_radix_sort, which needs no padding and works
+    for any characters. The "cached" engine reuses the groups stored by result_cache.ResultCache.
+    :param engine: "radix", "msd", "hash", "stream", "similar" or "cached"
+    :param processes: number of worker processes used by the "radix" engine to sort each user's movies
+    :raises: ValueError if the engine is not recognised.
     :return: none
     :time complexity: O(UCK) where U is the number of users, C is the maximum number of characters for any movie, and K
     is the maximum number of movies liked by a user.
     :space complexity: O(UCK) where U is the number of users, C is the maximum number of characters for any movie, and K
     is the maximum number of movies liked by a user.
     """
+    if engine == "hash" or engine == "stream" or engine == "msd" or engine == "cached":
+        print_movie_buddies(find_buddy_groups("favoriteMovies.txt", engine))
+        return
+    elif engine == "similar":
+        from buddies_similarity import group_similar_buddies, print_similar_buddies
+        print_similar_buddies(group_similar_buddies("favoriteMovies.txt"))
+        return
+    elif engine != "radix":
+        raise ValueError("invalid engine")
     data = read_in_data("favoriteMovies.txt")
     max_characters = data.pop()
     padding_users_movies(data)
-    sort_users_movies(data)
+    sort_users_movies(data, processes)
     remove_padding_of_movies(data)
     concatenate_and_pad_user_movies(data, max_characters)
     data = radix_sort_concatenated_movies(data, max_characters)
@@ -0,0 +1,192 @@
+import random
+import zlib
+
+from buddies import read_in_data_canonical
+
+# the hash functions are h(x) = (a * x + b) mod MERSENNE_PRIME, with a and b drawn from a seeded generator
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def make_hash_functions(num_hashes, seed):
+    """
+    this function draws the coefficients of num_hashes universal hash functions.
+    :param num_hashes:
+    :param seed: seed of the random generator, so that signatures of the same users are always the same
+    :return: list of (a, b) coefficients
+    :time complexity: O(H) where H is the number of hash functions
+    :space complexity: O(H) where H is the number of hash functions
+    """
+    generator = random.Random(seed)
+    coefficients = []
+    for _ in range(num_hashes):
+        coefficients.append((generator.randrange(1, MERSENNE_PRIME), generator.randrange(0, MERSENNE_PRIME)))
+    return coefficients
+
+
+def minhash_signature(movies, hash_functions):
+    """
+    this function computes the MinHash signature of a user's set of movies. For each hash function the signature keeps
+    the smallest hash of any of the user's movies. The probability that two users have the same value in one position
+    of their signatures is equal to the Jaccard similarity of their sets of movies.
+    :param movies: the user's movie names
+    :param hash_functions: list of (a, b) coefficients from make_hash_functions
+    :return: list of H minimum hashes
+    :time complexity: O(HK + CK) where H is the number of hash functions, K is the number of movies liked by the user,
+    and C is the maximum number of characters for any movie.
+    :space complexity: O(H + K) where H is the number of hash functions and K is the number of movies liked by the user
+    """
+    movie_hashes = []
+    for movie in set(movies):
+        movie_hashes.append(zlib.crc32(movie.encode("utf-8")))
+    signature = []
+    for a, b in hash_functions:
+        smallest = MERSENNE_PRIME
+        for x in movie_hashes:
+            value = (a * x + b) % MERSENNE_PRIME
+            if value < smallest:
+                smallest = value
+        signature.append(smallest)
+    return signature
+
+
+def jaccard_similarity(a_movies, b_movies):
+    """
+    this function computes the Jaccard similarity of two sets of movies, which is the number of movies they both like
+    divided by the number of movies either of them like.
+    :param a_movies: set of movie names
+    :param b_movies: set of movie names
+    :return: the Jaccard similarity between 0 and 1
+    :time complexity: O(K) where K is the maximum number of movies liked by a user
+    :space complexity: O(1) constant space
+    """
+    union = len(a_movies | b_movies)
+    if union == 0:
+        return 1.0
+    return len(a_movies & b_movies) / union
+
+
+def find_similar_buddies(users, threshold=0.7, bands=20, rows=5, seed=0, fanout=32):
+    """
+    this function finds groups of users whose sets of movies have a Jaccard similarity of at least threshold, without
+    comparing every pair of users. Users with exactly the same set of movies have a similarity of 1, so they are first
+    collapsed into one distinct set that keeps all of their user ids, and only distinct sets are hashed and compared.
+    Each set's MinHash signature is split into bands of rows values, and sets whose signatures are equal in any band
+    are put in the same bucket of that band. Two sets with similarity s share a bucket with probability
+    1 - (1 - s ** rows) ** bands, so more bands find more pairs, and more rows make the candidates more similar and the
+    function faster. Each set in a bucket is only compared with the first fanout sets of the bucket, so the number of
+    pairs compared is at most the number of distinct sets times bands times fanout, even if many sets are nearly the
+    same. The groups are then formed in the order the users were read in. Each set that is not in a group yet leads a
+    new group, which is joined by every set not in a group yet whose similarity with the leader is at least threshold.
+    Since a set is only ever joined to a group led by an earlier set, the first sets of a bucket are the ones it can
+    join. So every member of a group is similar to its leader, and groups do not chain together users that are not
+    similar.
+    :param users: iterable of (user id, movie names), such as buddies.read_in_data_canonical
+    :param threshold: minimum Jaccard similarity of a pair of buddies
+    :param bands: number of bands
+    :param rows: number of rows in a band
+    :param seed: seed of the hash functions
+    :param fanout: number of sets at the start of a bucket that each other set in the bucket is compared with
+    :raises: ValueError if the threshold is not between 0 and 1, or bands, rows or fanout is less than 1
+    :return: list of (list of user ids, leader first, and the smallest Jaccard similarity of a member to the leader)
+    :time complexity: O(UK + D(BR)K + DBFK) where U is the number of users, D is the number of distinct sets of movies,
+    B is the number of bands, R is the number of rows, F is the fanout, and K is the maximum number of movies liked by
+    a user.
+    :space complexity: O(UK + D(BR + BF)) where U is the number of users, D is the number of distinct sets of movies,
+    B is the number of bands, R is the number of rows, F is the fanout, and K is the maximum number of movies liked by
+    a user.
+    """
+    if not 0 <= threshold <= 1:
+        raise ValueError("invalid threshold")
+    if bands < 1 or rows < 1:
+        raise ValueError("invalid bands or rows")
+    if fanout < 1:
+        raise ValueError("invalid fanout")
+    hash_functions = make_hash_functions(bands * rows, seed)
+    set_index = {}
+    movie_sets = []
+    set_users = []
+    band_buckets = [{} for _ in range(bands)]
+    for user_id, movies in users:
+        movie_set = frozenset(movies)
+        if movie_set in set_index:
+            set_users[set_index[movie_set]].append(user_id)
+            continue
+        index = len(movie_sets)
+        set_index[movie_set] = index
+        movie_sets.append(movie_set)
+        set_users.append([user_id])
+        signature = minhash_signature(movie_set, hash_functions)
+        for band in range(bands):
+            key = tuple(signature[band * rows:(band + 1) * rows])
+            bucket = band_buckets[band]
+            if key in bucket:
+                bucket[key].append(index)
+            else:
+                bucket[key] = [index]
+    set_index = None
+
+    similar = [[] for _ in range(len(movie_sets))]
+    compared = set()
+    for bucket in band_buckets:
+        for members in bucket.values():
+            for i in range(min(fanout, len(members))):
+                for j in range(i + 1, len(members)):
+                    pair = (members[i], members[j])
+                    if pair in compared:
+                        continue
+                    compared.add(pair)
+                    similarity = jaccard_similarity(movie_sets[pair[0]], movie_sets[pair[1]])
+                    if similarity >= threshold:
+                        similar[pair[0]].append((pair[1], similarity))
+                        similar[pair[1]].append((pair[0], similarity))
+
+    similar_groups = []
+    grouped = [False] * len(movie_sets)
+    for leader in range(len(movie_sets)):
+        if grouped[leader]:
+            continue
+        members = list(set_users[leader])
+        lowest = 1.0
+        for other, similarity in sorted(similar[leader]):
+            if not grouped[other]:
+                grouped[other] = True
+                members.extend(set_users[other])
+                lowest = min(lowest, similarity)
+        if len(members) > 1:
+            grouped[leader] = True
+            similar_groups.append((members, lowest))
+    return similar_groups
+
+
+def group_similar_buddies(file_name, threshold=0.7, bands=20, rows=5, seed=0, fanout=32):
+    """
+    this function reads in the users stored in the given file with buddies.read_in_data_canonical and calls
+    find_similar_buddies on them.
+    :param file_name:
+    :param threshold: minimum Jaccard similarity of a pair of buddies
+    :param bands: number of bands
+    :param rows: number of rows in a band
+    :param seed: seed of the hash functions
+    :param fanout: see find_similar_buddies
+    :return: list of (list of user ids, leader first, and the smallest Jaccard similarity of a member to the leader)
+    :time complexity: see find_similar_buddies
+    :space complexity: see find_similar_buddies
+    """
+    return find_similar_buddies(read_in_data_canonical(file_name), threshold, bands, rows, seed, fanout)
+
+
+def print_similar_buddies(similar_groups):
+    """
+    this function prints the group number, the smallest similarity of the group and the user ids of the people in the
+    group, in the same style as buddies.print_movie_buddies.
+    :param similar_groups: list of (list of user ids, smallest Jaccard similarity) from find_similar_buddies
+    :return: none
+    :time complexity: O(U) where U is the number of users
+    :space complexity: O(U) where U is the number of users
+    """
+    group_num = 0
+    for buddies, similarity in similar_groups:
+        group_num += 1
+        print("GROUP {}".format(group_num))
+        print("Similarity: {:.2f}".format(similarity))
+        print("Buddies: {}\n".format(",".join(str(user_id) for user_id in buddies)))
@@ -0,0 +1,141 @@
+import heapq
+import os
+import tempfile
+
+from buddies import read_in_data_canonical, radix_order_key
+
+
+def read_in_batches(file_name, batch_size):
+    """
+    this function reads in the users stored in the given file in batches of at most batch_size users. Each user's
+    movies are canonicalized by buddies.read_in_data_canonical as they are read.
+    :param file_name:
+    :param batch_size: maximum number of users in a batch
+    :raises: ValueError if batch_size is less than 1
+    :return: a generator of lists of (user id, tuple of sorted movie names)
+    :time complexity: O(UK log K) where U is the number of users and K is the maximum number of movies liked by a user.
+    :space complexity: O(BCK) where B is the batch size, C is the maximum number of characters for any movie, and K is
+    the maximum number of movies liked by a user.
+    """
+    if batch_size < 1:
+        raise ValueError("invalid batch size")
+    batch = []
+    for user in read_in_data_canonical(file_name):
+        batch.append(user)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_order_key(group):
+    """
+    this function returns the key that groups are sorted by in a run. The movies are compared after the radix order key
+    so that two different tuples of movies with the same radix order key are never interleaved.
+    :param group: tuple of (tuple of sorted movie names, list of user ids)
+    :return: the sort key
+    :time complexity: O(CK) where C is the maximum number of characters for any movie, and K is the maximum number of
+    movies liked by a user.
+    :space complexity: O(CK) where C is the maximum number of characters for any movie, and K is the maximum number of
+    movies liked by a user.
+    """
+    return radix_order_key(group[0]), group[0]
+
+
+def spill_run(table, temp_dir):
+    """
+    this function sorts the groups in the table and writes them to a temporary run file, one group per line in the form
+    movie,movie,...:user id,user id,... which is the same form as a line of favoriteMovies.txt.
+    :param table: dictionary of tuple of sorted movie names to list of user ids
+    :param temp_dir: directory for the run file, or None for the system default
+    :return: the name of the run file
+    :time complexity: O(G log G + UCK) where G is the number of groups in the table, U is the number of users in the
+    table, C is the maximum number of characters for any movie, and K is the maximum number of movies liked by a user.
+    :space complexity: O(G) where G is the number of groups in the table
+    """
+    groups = sorted(table.items(), key=run_order_key)
+    descriptor, run_name = tempfile.mkstemp(prefix="buddies-run-", suffix=".txt", dir=temp_dir)
+    file = os.fdopen(descriptor, "w")
+    for movies, user_ids in groups:
+        file.write("{}:{}\n".format(",".join(movies), ",".join(str(user_id) for user_id in user_ids)))
+    file.close()
+    return run_name
+
+
+def read_in_run(run_name):
+    """
+    this function reads back the groups of a run file written by spill_run, in the order they were written.
+    :param run_name:
+    :return: a generator of (tuple of sorted movie names, list of user ids)
+    :time complexity: O(UCK) where U is the number of users in the run, C is the maximum number of characters for any
+    movie, and K is the maximum number of movies liked by a user.
+    :space complexity: O(CK + B) where C is the maximum number of characters for any movie, K is the maximum number of
+    movies liked by a user, and B is the largest group in the run.
+    """
+    file = open(run_name)
+    for line in file:
+        line = line.rstrip("\n")
+        movies, user_ids = line.split(":")
+        yield tuple(movies.split(",")), [int(user_id) for user_id in user_ids.split(",")]
+    file.close()
+
+
+def group_movie_buddies_stream(file_name, batch_size=10000, max_users_in_memory=1000000, temp_dir=None):
+    """
+    this function groups users that like exactly the same movies while holding at most max_users_in_memory users in
+    memory. Users are read in batches and added to a dictionary of canonical movies to user ids. Whenever the dictionary
+    holds more than max_users_in_memory users, it is sorted and spilled to a temporary run file and emptied. At the end
+    the runs and the last dictionary are merged with a k-way merge, and groups with the same movies from different runs
+    are joined. Since the runs are written in the order the file is read and the merge is stable, the user ids of each
+    group stay in the order they were read in. The groups come out in the order of run_order_key, which is the same
+    order as buddies.group_movie_buddies_hash and buddies.msd_radix_sort_users.
+    :param file_name:
+    :param batch_size: number of users read at a time
+    :param max_users_in_memory: number of users the dictionary can hold before it is spilled to disk
+    :param temp_dir: directory for the run files, or None for the system default
+    :raises: ValueError if batch_size or max_users_in_memory is less than 1
+    :return: a generator of (tuple of sorted movie names, list of user ids) for groups with at least two users
+    :time complexity: O(UCK log R + UK log K) where U is the number of users, C is the maximum number of characters for
+    any movie, K is the maximum number of movies liked by a user, and R is the number of runs.
+    :space complexity: O((M + B)CK) where M is max_users_in_memory, B is the batch size, C is the maximum number of
+    characters for any movie, and K is the maximum number of movies liked by a user.
+    """
+    if max_users_in_memory < 1:
+        raise ValueError("invalid memory budget")
+    run_names = []
+    try:
+        table = {}
+        users_in_table = 0
+        for batch in read_in_batches(file_name, batch_size):
+            for user_id, movies in batch:
+                if movies in table:
+                    table[movies].append(user_id)
+                else:
+                    table[movies] = [user_id]
+                users_in_table += 1
+                if users_in_table >= max_users_in_memory:
+                    run_names.append(spill_run(table, temp_dir))
+                    table = {}
+                    users_in_table = 0
+        runs = []
+        for run_name in run_names:
+            runs.append(read_in_run(run_name))
+        runs.append(iter(sorted(table.items(), key=run_order_key)))
+        table = None
+        current_movies = None
+        current_ids = []
+        for movies, user_ids in heapq.merge(*runs, key=run_order_key):
+            if movies == current_movies:
+                current_ids.extend(user_ids)
+                continue
+            if len(current_ids) > 1:
+                yield current_movies, current_ids
+            current_movies = movies
+            current_ids = list(user_ids)
+        if len(current_ids) > 1:
+            yield current_movies, current_ids
+    finally:
+        for run_name in run_names:
+            if os.path.exists(run_name):
+                os.remove(run_name)
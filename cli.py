@@ -0,0 +1,126 @@
+import argparse
+import csv
+import io
+import json
+import sys
+
+from buddies import iter_movie_buddies
+from topk import iter_topk_users
+
+
+def format_text(record):
+    """
+    this function formats a record in the same way as topk.get_max or buddies.group_and_print_movie_buddies print it.
+    :param record: a record from topk.iter_topk_users or buddies.iter_movie_buddies
+    :return: the formatted lines
+    :time complexity: O(L) where L is the length of the record
+    :space complexity: O(L) where L is the length of the record
+    """
+    if "rank" in record:
+        return "#{}: User ID: {} Time spent: {}\n".format(record["rank"], record["user_id"], record["time_spent"])
+    return "GROUP {}\nMovies: {}\nBuddies: {}\n\n".format(record["group"], ",".join(record["movies"]),
+                                                          ",".join(str(user_id) for user_id in record["buddies"]))
+
+
+def csv_row(record):
+    """
+    this function turns a record into a row of CSV fields. The movies and buddies of a group are joined with ";" so
+    that each group is one row.
+    :param record: a record from topk.iter_topk_users or buddies.iter_movie_buddies
+    :return: list of fields
+    :time complexity: O(L) where L is the length of the record
+    :space complexity: O(L) where L is the length of the record
+    """
+    if "rank" in record:
+        return [record["rank"], record["user_id"], record["time_spent"]]
+    return [record["group"], ";".join(record["movies"]), ";".join(str(user_id) for user_id in record["buddies"])]
+
+
+def write_records(records, output_format, output, buffer_size=1 << 20, csv_header=None):
+    """
+    this function writes records to output in the given format. The formatted records are collected in memory and
+    written with a single call each time at least buffer_size characters have been collected, instead of one write per
+    line.
+    :param records: iterable of records
+    :param output_format: "text", "jsonl" or "csv"
+    :param output: a text file
+    :param buffer_size: number of characters collected before they are written
+    :param csv_header: list of column names written first in "csv" format, or None
+    :raises: ValueError if the format is not recognised
+    :return: the number of records written
+    :time complexity: O(L) where L is the total length of the records
+    :space complexity: O(B) where B is buffer_size
+    """
+    if output_format not in ("text", "jsonl", "csv"):
+        raise ValueError("invalid output format")
+    chunk = io.StringIO()
+    writer = csv.writer(chunk, lineterminator="\n")
+    if output_format == "csv" and csv_header is not None:
+        writer.writerow(csv_header)
+    count = 0
+    for record in records:
+        if output_format == "text":
+            chunk.write(format_text(record))
+        elif output_format == "jsonl":
+            chunk.write(json.dumps(record) + "\n")
+        else:
+            writer.writerow(csv_row(record))
+        count += 1
+        if chunk.tell() >= buffer_size:
+            output.write(chunk.getvalue())
+            chunk.seek(0)
+            chunk.truncate()
+    output.write(chunk.getvalue())
+    output.flush()
+    return count
+
+
+def main(argv=None):
+    """
+    this function parses the command line arguments, runs topk or buddies as a library and writes the results.
+    :param argv: list of arguments, or None for sys.argv
+    :return: exit status
+    """
+    parser = argparse.ArgumentParser(description="Find the top-k users by time spent, or groups of movie buddies.")
+    parser.add_argument("--format", choices=["text", "jsonl", "csv"], default="text", help="output format")
+    parser.add_argument("--output", help="file to write to instead of stdout")
+    parser.add_argument("--buffer-size", type=int, default=1 << 20,
+                        help="number of characters collected before each write")
+    commands = parser.add_subparsers(dest="command", required=True)
+    topk_parser = commands.add_parser("topk", help="top-k users by time spent")
+    topk_parser.add_argument("--file", default="timeSpent.txt")
+    topk_parser.add_argument("-k", type=int, required=True)
+    topk_parser.add_argument("--mode", choices=["full", "bounded", "numpy", "snapshot", "parallel", "cached"],
+                             default="full")
+    topk_parser.add_argument("--snapshot", help="snapshot file to use in snapshot mode, instead of the input file "
+                                                "name with the extension .bin")
+    buddies_parser = commands.add_parser("buddies", help="groups of users that like exactly the same movies")
+    buddies_parser.add_argument("--file", default="favoriteMovies.txt")
+    buddies_parser.add_argument("--engine", choices=["radix", "msd", "hash", "stream", "cached"], default="hash")
+    buddies_parser.add_argument("--processes", type=int, default=1,
+                                help="worker processes for sorting each user's movies with the radix engine")
+    args = parser.parse_args(argv)
+
+    if args.command == "topk":
+        records = iter_topk_users(args.file, args.k, args.mode, args.snapshot)
+        header = ["rank", "user_id", "time_spent"]
+    else:
+        records = iter_movie_buddies(args.file, args.engine, args.processes)
+        header = ["group", "movies", "buddies"]
+    if args.output:
+        output = open(args.output, "w", newline="")
+    else:
+        output = sys.stdout
+    try:
+        write_records(records, args.format, output, args.buffer_size, header)
+    except ValueError as error:
+        print("error: {}".format(error), file=sys.stderr)
+        return 1
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
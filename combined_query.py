@@ -0,0 +1,122 @@
+from buddies import group_movie_buddies_hash, read_in_data_interned
+from movie_index import build_movie_index_from_users
+from topk import get_topk_from_heap, get_topk_from_stream, heapify, read_in_data
+
+
+def get_topk_of_users(users, k):
+    """
+    this function heapifys a list of (user id, time spent) tuples and gets the top-k of them with
+    topk.get_topk_from_heap. If there are fewer than k users, all of them are returned.
+    :param users: list of (user id, time spent) tuples
+    :param k: number of users to return
+    :return: list of at most k (user id, time spent) tuples, highest ranked first
+    :time complexity: O(n + k log k) where n is the number of users
+    :space complexity: O(n) where n is the number of users
+    """
+    if not users:
+        return []
+    data_heap = heapify([None] + users)
+    return get_topk_from_heap(data_heap, len(users), min(k, len(users)))
+
+
+class CombinedQuery:
+    """
+    a query engine over both timeSpent.txt and favoriteMovies.txt. It keeps every user's time spent, a
+    movie_index.MovieIndex of the users' favourite movies, and for every movie, and every group of users that like
+    exactly the same movies, the top precomputed_k users by time spent among its users, so "top k users that like a
+    movie" and "top k users of each group" are answered from the precomputed lists when k is at most precomputed_k.
+    Users that are only in one of the two files are left out of the results.
+    """
+
+    def __init__(self, time_file_name, movie_file_name, precomputed_k=100):
+        """
+        this function reads in both files and precomputes the top precomputed_k users of every movie with
+        topk.get_topk_from_stream, which keeps a bounded heap of size precomputed_k per movie. The groups of users that
+        like exactly the same movies are found once with buddies.group_movie_buddies_hash on the same users the index
+        is built from, so they are the same as buddies.find_buddy_groups, and their top precomputed_k users are
+        precomputed in the same way.
+        :param time_file_name:
+        :param movie_file_name:
+        :param precomputed_k: number of users kept for each movie
+        :raises: ValueError if precomputed_k is less than 1
+        :time complexity: O(N + UK log k + UCK + G log G) where N is the number of users in the time file, U is the
+        number of users in the movie file, K is the maximum number of movies liked by a user, k is precomputed_k, C is
+        the maximum number of characters for any movie, and G is the number of groups
+        :space complexity: O(N + UK + Mk) where N is the number of users in the time file, U is the number of users in
+        the movie file, K is the maximum number of movies liked by a user, M is the number of distinct movies, and k is
+        precomputed_k
+        """
+        if precomputed_k < 1:
+            raise ValueError("invalid input for k")
+        self.precomputed_k = precomputed_k
+        self.time_spent = {}
+        for user_id, time_spent in read_in_data(time_file_name)[1:]:
+            self.time_spent[user_id] = time_spent
+        titles, users = read_in_data_interned(movie_file_name)
+        self.buddy_groups = group_movie_buddies_hash(users, titles)
+        self.index = build_movie_index_from_users(titles, users)
+        self.movie_top = []
+        for posting in self.index.postings:
+            self.movie_top.append(get_topk_from_stream(self.users_with_time(posting), precomputed_k, partial=True))
+        self.group_top = []
+        for movies, buddies in self.buddy_groups:
+            self.group_top.append(get_topk_from_stream(self.users_with_time(buddies), precomputed_k, partial=True))
+
+    def users_with_time(self, user_ids):
+        """
+        this function pairs each user id with the user's time spent, leaving out users that have no time spent.
+        :param user_ids: iterable of user ids
+        :return: a generator of (user id, time spent) tuples
+        :time complexity: O(n) where n is the number of user ids
+        :space complexity: O(1) constant space
+        """
+        for user_id in user_ids:
+            if user_id in self.time_spent:
+                yield (user_id, self.time_spent[user_id])
+
+    def top_users_for_movie(self, movie, k):
+        """
+        this function returns the top-k users by time spent among the users that like the given movie. If k is at most
+        precomputed_k, or the movie has fewer users than precomputed_k, the answer is a slice of the precomputed list.
+        Otherwise the movie's users are heapified and the top-k are taken with get_topk_of_users.
+        :param movie: movie name
+        :param k: number of users to return
+        :raises: KeyError if no user likes the movie, ValueError if k is less than 1
+        :return: list of at most k (user id, time spent) tuples, highest ranked first
+        :time complexity: O(k) if k is at most precomputed_k, otherwise O(n + k log k) where n is the number of users
+        that like the movie
+        :space complexity: O(k) if k is at most precomputed_k, otherwise O(n) where n is the number of users that like
+        the movie
+        """
+        if k < 1:
+            raise ValueError("invalid input for k")
+        movie_id = self.index.movie_ids[movie]
+        movie_top = self.movie_top[movie_id]
+        if k <= self.precomputed_k or len(movie_top) < self.precomputed_k:
+            return movie_top[:k]
+        return get_topk_of_users(list(self.users_with_time(self.index.postings[movie_id])), k)
+
+    def top_users_per_group(self, k):
+        """
+        this function returns the top-k users by time spent of each group of users that like exactly the same movies.
+        As in top_users_for_movie, a group's answer is a slice of its precomputed list if k is at most precomputed_k or
+        the group has fewer users than precomputed_k, and otherwise the group's users are heapified.
+        :param k: number of users to return for each group
+        :raises: ValueError if k is less than 1
+        :return: list of (tuple of sorted movie names, list of at most k (user id, time spent) tuples), in the same
+        order as buddies.find_buddy_groups
+        :time complexity: O(Gk) where G is the number of groups if k is at most precomputed_k, otherwise
+        O(G + U + Gk log k) where U is the number of users in the groups
+        :space complexity: O(Gk) where G is the number of groups
+        """
+        if k < 1:
+            raise ValueError("invalid input for k")
+        group_tops = []
+        for i in range(len(self.buddy_groups)):
+            movies, buddies = self.buddy_groups[i]
+            group_top = self.group_top[i]
+            if k <= self.precomputed_k or len(group_top) < self.precomputed_k:
+                group_tops.append((movies, group_top[:k]))
+            else:
+                group_tops.append((movies, get_topk_of_users(list(self.users_with_time(buddies)), k)))
+        return group_tops
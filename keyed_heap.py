@@ -0,0 +1,189 @@
+import sys
+import time
+from array import array
+
+from topk import heapify, read_in_data, sift_down, swap
+
+# a key packs a user's value into the high 32 bits and MAX_ID - user id into the low 32 bits, so comparing two keys is
+# the same as comparing the values and then preferring the smaller user id, as find_largest_child does.
+MAX_ID = (1 << 32) - 1
+MAX_VALUE = (1 << 31) - 1
+
+
+def make_key(user_id, value, descending=True):
+    """
+    this function packs a user id and a value into one integer key, where a larger key is ranked higher. If descending
+    is True larger values are ranked higher, otherwise smaller values are ranked higher. Ties are always broken by the
+    smaller user id.
+    :param user_id: between 0 and MAX_ID
+    :param value: between 0 and MAX_VALUE
+    :param descending: whether larger values are ranked higher
+    :raises: ValueError if the user id or value is out of range
+    :return: the key
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    if not 0 <= user_id <= MAX_ID or not 0 <= value <= MAX_VALUE:
+        raise ValueError("user id or value out of range for a key")
+    if not descending:
+        value = MAX_VALUE - value
+    return (value << 32) | (MAX_ID - user_id)
+
+
+def split_key(key, descending=True):
+    """
+    this function unpacks a key made by make_key.
+    :param key:
+    :param descending: the value of descending the key was made with
+    :return: a tuple of (user id, value)
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    value = key >> 32
+    if not descending:
+        value = MAX_VALUE - value
+    return MAX_ID - (key & MAX_ID), value
+
+
+def make_keys(users, descending=True, metric=None, compact=False):
+    """
+    this function builds a heap array of keys with make_key from (user id, time spent) tuples, with an unused 0 at
+    position 0 so it has the same layout as the lists used by topk.heapify. metric can be given to rank the users by
+    something other than their time spent. If compact is True the keys are stored in an array('q') of 64-bit integers,
+    which takes 8 bytes per user instead of a tuple of two ints, but each read of an array element creates a new int,
+    so sifting a list of keys is faster.
+    :param users: iterable of (user id, time spent) tuples
+    :param descending: whether larger values are ranked higher
+    :param metric: function from a (user id, time spent) tuple to the value to rank by, or None for the time spent
+    :param compact: whether to return an array('q') instead of a list
+    :raises: ValueError if a user id or value is out of range
+    :return: list or array of keys
+    :time complexity: O(N) where N is the number of users
+    :space complexity: O(N) where N is the number of users
+    """
+    keys = [0]
+    for user_data in users:
+        user_id = user_data[0]
+        if metric is None:
+            value = user_data[1]
+        else:
+            value = metric(user_data)
+        keys.append(make_key(user_id, value, descending))
+    if compact:
+        return array("q", keys)
+    return keys
+
+
+def heapify_keys(keys):
+    """
+    this function heapifys an array of keys into a max heap in the same way as topk.heapify.
+    :param keys: list or array of keys from make_keys
+    :return: the max heap
+    :time complexity: O(N) where N is the number of users
+    :space complexity: O(1) constant space
+    """
+    count = len(keys) - 1
+    sub_root = count // 2
+    while sub_root >= 1:
+        sift_down_keys(keys, sub_root, count)
+        sub_root -= 1
+    return keys
+
+
+def sift_down_keys(keys, root, count):
+    """
+    this function is topk.sift_down for an array of keys. Since each key already includes the tie break, finding the
+    largest child and comparing it with the parent are each a single integer comparison. The root's key is held aside
+    and only written once its position is found, instead of being swapped at every level.
+    :param keys: list or array of keys
+    :param root: the root of the heap structure
+    :param count: size of the heap
+    :return: none
+    :time complexity: O(log N) where N is the number of users
+    :space complexity: O(1) constant space
+    """
+    parent = root
+    key = keys[parent]
+    child = 2 * parent
+    while child <= count:
+        if child < count and keys[child + 1] > keys[child]:
+            child += 1
+        if key >= keys[child]:
+            break
+        keys[parent] = keys[child]
+        parent = child
+        child = 2 * parent
+    keys[parent] = key
+
+
+def get_topk_keyed(users, k, descending=True, metric=None, compact=False):
+    """
+    this function finds the top-k users by building an array of keys, heapifying it, and taking the maximum k times
+    like topk.get_max.
+    :param users: iterable of (user id, time spent) tuples
+    :param k: number of users to return
+    :param descending: whether larger values are ranked higher
+    :param metric: function from a (user id, time spent) tuple to the value to rank by, or None for the time spent
+    :param compact: whether to keep the keys in an array('q'), see make_keys
+    :raises: ValueError if 1 > k > N, where N is the number of users, or if a user id or value is out of range
+    :return: list of the top-k (user id, value) tuples, highest ranked first
+    :time complexity: O(N + k log N) where N is the number of users
+    :space complexity: O(N) where N is the number of users
+    """
+    keys = heapify_keys(make_keys(users, descending, metric, compact))
+    count = len(keys) - 1
+    if not 1 <= k <= count:
+        raise ValueError("invalid input for k")
+    top_users = []
+    for _ in range(k):
+        top_users.append(split_key(keys[1], descending))
+        keys[1] = keys[count]
+        count -= 1
+        sift_down_keys(keys, 1, count)
+    return top_users
+
+
+def benchmark_keyed_heap(file_name, k, repeats=5):
+    """
+    this function times heapifying the users in the given file and taking the top-k with the tuple heap in topk, with
+    a list of keys, and with an array('q') of keys, and returns the best time of each over the given number of repeats.
+    The tuple heap is timed the same way as get_max, without printing. The keyed heaps include building the keys.
+    :param file_name:
+    :param k: number of users to take
+    :param repeats: number of times each heap is timed
+    :return: dictionary of the best seconds taken by each heap and the speedup of each keyed heap
+    :time complexity: O(R(N + k log N)) where R is the number of repeats and N is the number of users
+    :space complexity: O(N) where N is the number of users
+    """
+    users = read_in_data(file_name)[1:]
+    tuple_times = []
+    keyed_times = []
+    compact_times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        data_heap = heapify([None] + users)
+        count = len(data_heap) - 1
+        tuple_top = []
+        for _ in range(k):
+            tuple_top.append(data_heap[1])
+            swap(data_heap, 1, count)
+            count -= 1
+            sift_down(data_heap, 1, count)
+        tuple_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        get_topk_keyed(users, k)
+        keyed_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        get_topk_keyed(users, k, compact=True)
+        compact_times.append(time.perf_counter() - started)
+    return {"users": len(users), "k": k, "tuple_seconds": min(tuple_times), "keyed_seconds": min(keyed_times),
+            "compact_seconds": min(compact_times), "keyed_speedup": min(tuple_times) / min(keyed_times),
+            "compact_speedup": min(tuple_times) / min(compact_times)}
+
+
+if __name__ == '__main__':
+    file_name = "timeSpent.txt"
+    if len(sys.argv) > 1:
+        file_name = sys.argv[1]
+    for k in (10, 1000, 10000):
+        print(benchmark_keyed_heap(file_name, k))
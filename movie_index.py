@@ -0,0 +1,360 @@
+import struct
+from array import array
+
+from buddies import read_in_data_interned
+from topk import get_topk_from_stream
+
+# an index file starts with the magic bytes, the format version, the number of movies and the number of users, followed
+# by the movie names as one utf-8 line each and one posting list per movie. A posting list is stored as its length
+# followed by the gaps between consecutive user ids, all as variable-length integers. The file ends with the number of
+# users that list a movie more than once, followed by each of those users' id, number of movies and movie ids, also as
+# variable-length integers.
+INDEX_MAGIC = b"MVIX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sIQQ")
+
+
+def encode_varint(value, output):
+    """
+    this function appends a non-negative integer to output using 7 bits per byte, where the high bit of a byte is set
+    if more bytes follow.
+    :param value:
+    :param output: bytearray
+    :return: none
+    :time complexity: O(log V) where V is the value
+    :space complexity: O(log V) where V is the value
+    """
+    while value >= 128:
+        output.append((value & 127) | 128)
+        value >>= 7
+    output.append(value)
+
+
+def decode_varint(data, position):
+    """
+    this function reads a variable-length integer written by encode_varint.
+    :param data: bytes
+    :param position: position of the first byte of the integer
+    :return: a tuple of (value, position after the integer)
+    :time complexity: O(log V) where V is the value
+    :space complexity: O(1) constant space
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 127) << shift
+        if byte < 128:
+            return value, position
+        shift += 7
+
+
+def gallop(posting, target, low):
+    """
+    this function finds the first position at or after low whose user id is at least target. It doubles the step until
+    it passes target and then binary searches the last step, so finding a target d positions ahead takes O(log d).
+    :param posting: sorted array of user ids
+    :param target: user id to look for
+    :param low: position to start from
+    :return: the first position at or after low with a user id of at least target, or len(posting) if there is none
+    :time complexity: O(log d) where d is the distance to the position found
+    :space complexity: O(1) constant space
+    """
+    size = len(posting)
+    step = 1
+    high = low
+    while high < size and posting[high] < target:
+        low = high + 1
+        high += step
+        step *= 2
+    if high > size:
+        high = size
+    while low < high:
+        middle = (low + high) // 2
+        if posting[middle] < target:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def gallop_intersect(postings):
+    """
+    this function intersects sorted posting lists. It starts from the shortest list and, for each of its user ids,
+    gallops forward in every other list, so a long list costs only O(log) steps per user id of the shortest list.
+    :param postings: list of sorted arrays of user ids
+    :return: list of user ids that are in every posting list
+    :time complexity: O(P s log(L / s)) where P is the number of lists, s is the length of the shortest list and L is
+    the length of the longest list
+    :space complexity: O(s) where s is the length of the shortest list
+    """
+    if not postings:
+        return []
+    postings = sorted(postings, key=len)
+    positions = [0] * len(postings)
+    result = []
+    for user_id in postings[0]:
+        found = True
+        for i in range(1, len(postings)):
+            positions[i] = gallop(postings[i], user_id, positions[i])
+            if positions[i] == len(postings[i]):
+                return result
+            if postings[i][positions[i]] != user_id:
+                found = False
+                break
+        if found:
+            result.append(user_id)
+    return result
+
+
+class MovieIndex:
+    """
+    an inverted index from each movie to the sorted list of users that like it, built from favoriteMovies.txt with
+    buddies.read_in_data_interned. Movie ids are the ones given by read_in_data_interned, so they are in alphabetical
+    order of movie name. Each user's sorted movie ids are also kept, so that the index can answer queries about a user.
+    A posting list has each user once, even if the user lists the movie more than once, so the full sorted movie ids of
+    those users are kept in repeats, and two users only like exactly the same movies if they list each movie the same
+    number of times, as in buddies.find_buddy_groups.
+    """
+
+    def __init__(self, titles, postings, repeats=None):
+        """
+        this function builds the index from a list of movie names and one sorted posting list per movie, and builds
+        each user's list of movie ids from the posting lists.
+        :param titles: list of movie names indexed by movie id
+        :param postings: list of sorted arrays of user ids indexed by movie id
+        :param repeats: dictionary of user id to the array of all of the user's sorted movie ids, for users that list a
+        movie more than once, or None if there are none
+        :time complexity: O(UK) where U is the number of users and K is the maximum number of movies liked by a user
+        :space complexity: O(UK) where U is the number of users and K is the maximum number of movies liked by a user
+        """
+        if repeats is None:
+            repeats = {}
+        self.repeats = repeats
+        self.titles = titles
+        self.movie_ids = {}
+        for movie_id in range(len(titles)):
+            self.movie_ids[titles[movie_id]] = movie_id
+        self.postings = postings
+        self.user_movies = {}
+        for movie_id in range(len(postings)):
+            for user_id in postings[movie_id]:
+                if user_id in self.user_movies:
+                    self.user_movies[user_id].append(movie_id)
+                else:
+                    self.user_movies[user_id] = array("i", [movie_id])
+
+    def movies_of(self, user_id):
+        """
+        this function returns all of the movie ids a user lists, including movies listed more than once.
+        :param user_id:
+        :raises: KeyError if the user is not in the index
+        :return: sorted array of movie ids
+        :time complexity: O(1) constant time
+        :space complexity: O(1) constant space
+        """
+        if user_id in self.repeats:
+            return self.repeats[user_id]
+        return self.user_movies[user_id]
+
+    def users_who_like(self, movie):
+        """
+        this function returns the users that like the given movie.
+        :param movie: movie name
+        :raises: KeyError if no user likes the movie
+        :return: sorted array of user ids
+        :time complexity: O(1) constant time
+        :space complexity: O(1) constant space
+        """
+        return self.postings[self.movie_ids[movie]]
+
+    def exact_buddies(self, user_id):
+        """
+        this function returns the other users that like exactly the same movies as the given user. It intersects the
+        posting lists of the user's movies and keeps the users whose movies, counted with movies_of, are the same.
+        :param user_id:
+        :raises: KeyError if the user is not in the index
+        :return: sorted list of user ids
+        :time complexity: O(K s log(U / s)) where K is the number of movies liked by the user, s is the length of the
+        shortest posting list of the user's movies, and U is the number of users
+        :space complexity: O(s) where s is the length of the shortest posting list of the user's movies
+        """
+        movies = self.user_movies[user_id]
+        all_movies = self.movies_of(user_id)
+        buddies = []
+        for other in gallop_intersect([self.postings[movie_id] for movie_id in movies]):
+            if other != user_id and len(self.user_movies[other]) == len(movies) and self.movies_of(other) == all_movies:
+                buddies.append(other)
+        return buddies
+
+    def overlap_counts(self, user_id):
+        """
+        this function counts, for every other user that shares at least one movie with the given user, how many movies
+        they share, by walking the posting lists of the user's movies.
+        :param user_id:
+        :raises: KeyError if the user is not in the index
+        :return: dictionary of user id to number of shared movies
+        :time complexity: O(P) where P is the total length of the posting lists of the user's movies
+        :space complexity: O(U) where U is the number of users
+        """
+        counts = {}
+        for movie_id in self.user_movies[user_id]:
+            for other in self.postings[movie_id]:
+                if other in counts:
+                    counts[other] += 1
+                else:
+                    counts[other] = 1
+        del counts[user_id]
+        return counts
+
+    def sharing_at_least(self, user_id, n):
+        """
+        this function returns the other users that share at least n movies with the given user. If n is the number of
+        movies the user likes, the posting lists are intersected with gallop_intersect instead of being counted.
+        :param user_id:
+        :param n: minimum number of shared movies
+        :raises: KeyError if the user is not in the index, ValueError if n is less than 1
+        :return: sorted list of user ids
+        :time complexity: O(P) where P is the total length of the posting lists of the user's movies
+        :space complexity: O(U) where U is the number of users
+        """
+        if n < 1:
+            raise ValueError("invalid input for n")
+        movies = self.user_movies[user_id]
+        if n > len(movies):
+            return []
+        if n == len(movies):
+            shared = gallop_intersect([self.postings[movie_id] for movie_id in movies])
+            return [other for other in shared if other != user_id]
+        counts = self.overlap_counts(user_id)
+        return sorted(other for other in counts if counts[other] >= n)
+
+    def top_overlapping(self, user_id, k):
+        """
+        this function returns the k other users that share the most movies with the given user, using
+        topk.get_topk_from_stream on (user id, number of shared movies) tuples, so ties are broken by the smaller user
+        id. Fewer than k users are returned if fewer than k users share a movie with the user.
+        :param user_id:
+        :param k: number of users to return
+        :raises: KeyError if the user is not in the index, ValueError if k is less than 1
+        :return: list of (user id, number of shared movies) tuples, most shared first
+        :time complexity: O(P + U log k) where P is the total length of the posting lists of the user's movies and U is
+        the number of users
+        :space complexity: O(U) where U is the number of users
+        """
+        return get_topk_from_stream(self.overlap_counts(user_id).items(), k, partial=True)
+
+    def save(self, file_name):
+        """
+        this function writes the index to a file. Each posting list is stored as the gaps between consecutive user
+        ids, which are small numbers that take one or two bytes as variable-length integers.
+        :param file_name:
+        :return: none
+        :time complexity: O(UK) where U is the number of users and K is the maximum number of movies liked by a user
+        :space complexity: O(UK) where U is the number of users and K is the maximum number of movies liked by a user
+        """
+        output = bytearray(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(self.titles), len(self.user_movies)))
+        for title in self.titles:
+            output += title.encode("utf-8") + b"\n"
+        for posting in self.postings:
+            encode_varint(len(posting), output)
+            previous = 0
+            for user_id in posting:
+                encode_varint(user_id - previous, output)
+                previous = user_id
+        encode_varint(len(self.repeats), output)
+        for user_id in sorted(self.repeats):
+            encode_varint(user_id, output)
+            encode_varint(len(self.repeats[user_id]), output)
+            for movie_id in self.repeats[user_id]:
+                encode_varint(movie_id, output)
+        file = open(file_name, "wb")
+        file.write(output)
+        file.close()
+
+
+def build_movie_index(file_name):
+    """
+    this function reads in the data stored in the given file with buddies.read_in_data_interned and builds a
+    MovieIndex. The users are put into the posting lists of their movies in order of user id, so the posting lists are
+    sorted. A user that lists a movie more than once is put in its posting list once and added to the index's repeats.
+    :param file_name:
+    :return: a MovieIndex of every user in the file
+    :time complexity: O(UK log U + M log M) where U is the number of users, K is the maximum number of movies liked by
+    a user, and M is the number of distinct movies
+    :space complexity: O(UK) where U is the number of users and K is the maximum number of movies liked by a user
+    """
+    titles, users = read_in_data_interned(file_name)
+    return build_movie_index_from_users(titles, users)
+
+
+def build_movie_index_from_users(titles, users):
+    """
+    this function builds a MovieIndex from users that have already been read in with buddies.read_in_data_interned.
+    The users are sorted by user id in place.
+    :param titles: list of movie names indexed by movie id
+    :param users: list of (user id, array of sorted movie ids)
+    :return: a MovieIndex of the users
+    :time complexity: O(UK + U log U) where U is the number of users and K is the maximum number of movies liked by a
+    user
+    :space complexity: O(UK) where U is the number of users and K is the maximum number of movies liked by a user
+    """
+    users.sort(key=lambda user: user[0])
+    postings = [array("q") for _ in range(len(titles))]
+    repeats = {}
+    for user_id, movie_ids in users:
+        previous = -1
+        for movie_id in movie_ids:
+            if movie_id != previous:
+                postings[movie_id].append(user_id)
+                previous = movie_id
+            else:
+                repeats[user_id] = movie_ids
+    return MovieIndex(titles, postings, repeats)
+
+
+def load_movie_index(file_name):
+    """
+    this function reads in an index written by MovieIndex.save.
+    :param file_name:
+    :raises: ValueError if the file is not an index file
+    :return: the MovieIndex
+    :time complexity: O(UK) where U is the number of users and K is the maximum number of movies liked by a user
+    :space complexity: O(UK) where U is the number of users and K is the maximum number of movies liked by a user
+    """
+    file = open(file_name, "rb")
+    data = file.read()
+    file.close()
+    if len(data) < INDEX_HEADER.size:
+        raise ValueError("{} is not a movie index file".format(file_name))
+    magic, version, num_titles, num_users = INDEX_HEADER.unpack_from(data, 0)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION:
+        raise ValueError("{} is not a movie index file".format(file_name))
+    position = INDEX_HEADER.size
+    titles = []
+    for _ in range(num_titles):
+        end = data.index(b"\n", position)
+        titles.append(data[position:end].decode("utf-8"))
+        position = end + 1
+    postings = []
+    for _ in range(num_titles):
+        length, position = decode_varint(data, position)
+        posting = array("q")
+        user_id = 0
+        for _ in range(length):
+            gap, position = decode_varint(data, position)
+            user_id += gap
+            posting.append(user_id)
+        postings.append(posting)
+    repeats = {}
+    num_repeats, position = decode_varint(data, position)
+    for _ in range(num_repeats):
+        user_id, position = decode_varint(data, position)
+        length, position = decode_varint(data, position)
+        movie_ids = array("i")
+        for _ in range(length):
+            movie_id, position = decode_varint(data, position)
+            movie_ids.append(movie_id)
+        repeats[user_id] = movie_ids
+    return MovieIndex(titles, postings, repeats)
@@ -0,0 +1,329 @@
+import contextlib
+import json
+import os
+import time
+
+import buddies
+import buddies_stream
+import result_cache
+import snapshot
+import topk
+import topk_index
+
+# the functions of each module that are timed as a stage while profiling
+TOPK_STAGES = ["read_in_data", "heapify", "get_max", "get_topk_from_heap"]
+BUDDIES_STAGES = ["read_in_data", "padding_users_movies", "sort_users_movies", "remove_padding_of_movies",
+                  "concatenate_and_pad_user_movies", "radix_sort_concatenated_movies", "group_and_print_movie_buddies",
+                  "find_movie_buddies"]
+# the functions of each module that read a file, whose size is added to bytes_parsed. The ones that take the byte
+# offset to start reading from as their second argument are marked True.
+READERS = [(topk, "read_in_data", False), (topk, "read_in_data_stream", True), (buddies, "read_in_data", False),
+           (buddies, "read_in_data_interned", False), (buddies, "read_in_data_canonical", True),
+           (buddies_stream, "read_in_data_canonical", True), (snapshot, "read_in_data_stream", True),
+           (snapshot, "open_snapshot", False), (result_cache, "read_in_data_stream", True),
+           (result_cache, "read_in_data_canonical", True)]
+
+
+class Stats:
+    """
+    the counters recorded while profiling. stage_seconds and stage_calls are keyed by "module.function". Comparisons,
+    swaps and sift_down levels made on the frontier heap inside topk.get_topk_from_heap are counted separately, in the
+    counters starting with frontier_, so that they are not mixed with the ones made on the main heap.
+    """
+
+    def __init__(self):
+        self.stage_seconds = {}
+        self.stage_calls = {}
+        self.comparisons = 0
+        self.swaps = 0
+        self.sift_down_levels = 0
+        self.frontier_comparisons = 0
+        self.frontier_swaps = 0
+        self.frontier_sift_down_levels = 0
+        self.bucket_passes = 0
+        self.elements_moved = 0
+        self.bytes_parsed = 0
+
+    def to_dict(self):
+        """
+        this function returns the counters as a dictionary that can be written as JSON.
+        :return: dictionary of the counters
+        :time complexity: O(S) where S is the number of stages
+        :space complexity: O(S) where S is the number of stages
+        """
+        return {"stage_seconds": dict(self.stage_seconds), "stage_calls": dict(self.stage_calls),
+                "comparisons": self.comparisons, "swaps": self.swaps, "sift_down_levels": self.sift_down_levels,
+                "frontier_comparisons": self.frontier_comparisons, "frontier_swaps": self.frontier_swaps,
+                "frontier_sift_down_levels": self.frontier_sift_down_levels, "bucket_passes": self.bucket_passes,
+                "elements_moved": self.elements_moved, "bytes_parsed": self.bytes_parsed}
+
+
+def timed(stats, name, function, trace):
+    """
+    this function wraps a stage function so that every call adds its wall time to the stage's total, and, if trace is
+    a list, records a trace event. Only the outermost call is timed if the stage calls itself.
+    :param stats: Stats
+    :param name: stage name
+    :param function: the stage function
+    :param trace: list of trace events, or None
+    :return: the wrapped function
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    depth = [0]
+
+    def wrapper(*args, **kwargs):
+        if depth[0]:
+            return function(*args, **kwargs)
+        depth[0] += 1
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - started
+            depth[0] -= 1
+            stats.stage_seconds[name] = stats.stage_seconds.get(name, 0.0) + seconds
+            stats.stage_calls[name] = stats.stage_calls.get(name, 0) + 1
+            if trace is not None:
+                trace.append({"stage": name, "start": started, "seconds": seconds})
+    return wrapper
+
+
+def in_frontier(function, frontier):
+    """
+    this function wraps topk.get_topk_from_heap, or the copy imported into topk_index, so that frontier[0] is above 0
+    while it runs, which makes the counting wrappers add to the frontier_ counters of Stats instead of the main heap's
+    counters.
+    :param function: topk.get_topk_from_heap
+    :param frontier: list of one int, shared with the counting wrappers
+    :return: the wrapped function
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    def wrapper(*args, **kwargs):
+        frontier[0] += 1
+        try:
+            return function(*args, **kwargs)
+        finally:
+            frontier[0] -= 1
+    return wrapper
+
+
+def counting_find_largest_child(stats, function, frontier):
+    """
+    this function wraps topk.find_largest_child, which is only called once per level of topk.sift_down, so every call
+    counts one sift_down level and the comparisons made at that level.
+    :param stats: Stats
+    :param function: topk.find_largest_child
+    :param frontier: list of one int that is above 0 inside topk.get_topk_from_heap, see in_frontier
+    :return: the wrapped function
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    def wrapper(a_heap, parent, left_child, count):
+        largest_child = function(a_heap, parent, left_child, count)
+        # the comparisons are not measured, since comparing two ints cannot be hooked. They are derived by repeating
+        # the comparisons of find_largest_child and of the sift_down loop iteration that called it on the same
+        # elements, so this has to be kept in step with those two functions.
+        comparisons = 0
+        if 2 * parent + 1 <= count:
+            right_child = 2 * parent + 1
+            if a_heap[left_child][1] > a_heap[right_child][1]:
+                comparisons += 1
+            elif a_heap[right_child][1] > a_heap[left_child][1]:
+                comparisons += 2
+            else:
+                comparisons += 3
+        if a_heap[parent][1] > a_heap[largest_child][1]:
+            comparisons += 1
+        elif a_heap[parent][1] == a_heap[largest_child][1]:
+            comparisons += 3
+        else:
+            comparisons += 2
+        if frontier[0]:
+            stats.frontier_comparisons += comparisons
+            stats.frontier_sift_down_levels += 1
+        else:
+            stats.comparisons += comparisons
+            stats.sift_down_levels += 1
+        return largest_child
+    return wrapper
+
+
+def counting_sift_up(stats, function, frontier):
+    """
+    this function wraps topk.sift_up so that every call counts the comparisons it makes.
+    :param stats: Stats
+    :param function: topk.sift_up
+    :param frontier: list of one int that is above 0 inside topk.get_topk_from_heap, see in_frontier
+    :return: the wrapped function
+    :time complexity: O(log N) where N is the size of the heap
+    :space complexity: O(1) constant space
+    """
+    def wrapper(a_list, child):
+        # as in counting_find_largest_child, the comparisons are derived rather than measured. The node is followed up
+        # the heap before sift_up moves it, repeating sift_up's comparisons with each parent, so this has to be kept
+        # in step with sift_up.
+        node = a_list[child]
+        position = child
+        comparisons = 0
+        while position > 1:
+            parent = a_list[position // 2]
+            if parent[1] > node[1]:
+                comparisons += 1
+                break
+            elif parent[1] == node[1]:
+                comparisons += 3
+                if parent[0] < node[0]:
+                    break
+            else:
+                comparisons += 2
+            position //= 2
+        if frontier[0]:
+            stats.frontier_comparisons += comparisons
+        else:
+            stats.comparisons += comparisons
+        function(a_list, child)
+    return wrapper
+
+
+def counting_swap(stats, function, frontier):
+    """
+    this function wraps topk.swap so that every call is counted.
+    :param stats: Stats
+    :param function: topk.swap
+    :param frontier: list of one int that is above 0 inside topk.get_topk_from_heap, see in_frontier
+    :return: the wrapped function
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    def wrapper(an_array, i, j):
+        if frontier[0]:
+            stats.frontier_swaps += 1
+        else:
+            stats.swaps += 1
+        function(an_array, i, j)
+    return wrapper
+
+
+def counting_read(stats, function, has_start=False):
+    """
+    this function wraps a function that reads a file so that the size of every file it reads is added to
+    bytes_parsed. If has_start is True, the function's second argument, or its start keyword argument, is the byte
+    offset it starts reading from, and only the bytes from there on are added.
+    :param stats: Stats
+    :param function: read_in_data, or another function whose first argument is the name of the file it reads
+    :param has_start: whether the function takes the byte offset to start from
+    :return: the wrapped function
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    def wrapper(file_name, *args, **kwargs):
+        start = 0
+        if has_start:
+            if args:
+                start = args[0]
+            else:
+                start = kwargs.get("start", 0)
+        stats.bytes_parsed += os.path.getsize(file_name) - start
+        return function(file_name, *args, **kwargs)
+    return wrapper
+
+
+def counting_radix_sort_users_movies(stats, function):
+    """
+    this function wraps buddies.radix_sort_users_movies. That sort makes one bucket pass per character of the user's
+    padded movie names and moves every movie into a bucket and back on each pass.
+    :param stats: Stats
+    :param function: buddies.radix_sort_users_movies
+    :return: the wrapped function
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    def wrapper(my_list, user_id):
+        passes = len(my_list[1][0])
+        stats.bucket_passes += passes
+        stats.elements_moved += 2 * passes * (len(my_list) - 1)
+        return function(my_list, user_id)
+    return wrapper
+
+
+def counting_radix_sort_concatenated_movies(stats, function):
+    """
+    this function wraps buddies.radix_sort_concatenated_movies. That sort makes one bucket pass per character of the
+    longest concatenated movie string and moves every user into a bucket and back on each pass.
+    :param stats: Stats
+    :param function: buddies.radix_sort_concatenated_movies
+    :return: the wrapped function
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    def wrapper(users_list, max_char):
+        stats.bucket_passes += max_char
+        stats.elements_moved += 2 * max_char * len(users_list)
+        return function(users_list, max_char)
+    return wrapper
+
+
+@contextlib.contextmanager
+def profile(stats=None, callback=None, trace_file=None):
+    """
+    this function is a context manager that profiles every call to the topk and buddies pipelines made inside it. The
+    module functions are replaced by wrappers that time each stage and count comparisons, swaps and sift_down levels
+    in topk, separately for the main heap and for the frontier heap of get_topk_from_heap, bucket passes and elements
+    moved by the radix sorts in buddies, and bytes read by the functions in READERS and, if NumPy is installed, by
+    topk_numpy.read_in_data_numpy. The original functions are put back when the context exits, so nothing is counted,
+    and nothing costs extra, outside of it. Functions that were imported by name into another module before profiling
+    started are not replaced in that module, and nothing done in the worker processes of the "parallel" top-k mode or
+    the multiprocessing sort of buddies is counted.
+    :param stats: Stats to add the counters to, or None for a new one
+    :param callback: function that is called with the Stats when the context exits, or None
+    :param trace_file: name of a file to write one JSON line per stage call to, or None
+    :return: the Stats
+    """
+    if stats is None:
+        stats = Stats()
+    trace = None
+    if trace_file is not None:
+        trace = []
+    replaced = []
+    frontier = [0]
+
+    def replace(module, name, wrapper):
+        replaced.append((module, name, getattr(module, name)))
+        setattr(module, name, wrapper)
+
+    for name in TOPK_STAGES:
+        replace(topk, name, timed(stats, "topk." + name, getattr(topk, name), trace))
+    for name in BUDDIES_STAGES:
+        replace(buddies, name, timed(stats, "buddies." + name, getattr(buddies, name), trace))
+    for module, name, has_start in READERS:
+        replace(module, name, counting_read(stats, getattr(module, name), has_start))
+    try:
+        import topk_numpy
+    except ImportError:
+        topk_numpy = None
+    if topk_numpy is not None:
+        replace(topk_numpy, "read_in_data_numpy", counting_read(stats, topk_numpy.read_in_data_numpy))
+    replace(topk, "get_topk_from_heap", in_frontier(topk.get_topk_from_heap, frontier))
+    replace(topk_index, "get_topk_from_heap", in_frontier(topk_index.get_topk_from_heap, frontier))
+    replace(topk, "find_largest_child", counting_find_largest_child(stats, topk.find_largest_child, frontier))
+    replace(topk, "sift_up", counting_sift_up(stats, topk.sift_up, frontier))
+    replace(topk, "swap", counting_swap(stats, topk.swap, frontier))
+    replace(buddies, "radix_sort_users_movies", counting_radix_sort_users_movies(stats,
+                                                                                  buddies.radix_sort_users_movies))
+    replace(buddies, "radix_sort_concatenated_movies",
+            counting_radix_sort_concatenated_movies(stats, buddies.radix_sort_concatenated_movies))
+    try:
+        yield stats
+    finally:
+        while replaced:
+            module, name, original = replaced.pop()
+            setattr(module, name, original)
+        if trace is not None:
+            file = open(trace_file, "w")
+            for event in trace:
+                file.write(json.dumps(event) + "\n")
+            file.close()
+        if callback is not None:
+            callback(stats)
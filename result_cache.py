@@ -0,0 +1,339 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+from buddies import group_movie_buddies_hash, read_in_data_canonical
+from topk import read_in_data_stream
+from topk_index import TopkIndex
+
+# number of bytes read at a time when fingerprinting a file
+CHUNK_SIZE = 1 << 20
+
+
+def default_cache_dir():
+    """
+    this function returns the directory the cache is kept in by default, which is topk under $XDG_CACHE_HOME, or under
+    ~/.cache if it is not set. It belongs to the user, so it does not depend on the directory a query is run from.
+    :return: the directory name
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    if not cache_home:
+        cache_home = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "topk")
+
+
+def fingerprint_prefixes(file_name, sizes):
+    """
+    this function computes the SHA-256 fingerprint of the whole file, and of the first size bytes of the file for each
+    of the given sizes, in a single pass. For each size it also records whether those bytes end with a newline, since
+    a file can only be treated as appended to if the old contents ended at the end of a line.
+    :param file_name:
+    :param sizes: byte counts smaller than the file size
+    :return: a tuple of (file size, fingerprint of the file, dictionary of size to (fingerprint, ends with newline))
+    :time complexity: O(B + S log S) where B is the size of the file and S is the number of sizes
+    :space complexity: O(S + CHUNK_SIZE) where S is the number of sizes
+    """
+    boundaries = sorted(set(sizes))
+    prefixes = {}
+    hasher = hashlib.sha256()
+    position = 0
+    last_byte = b""
+    next_boundary = 0
+    file = open(file_name, "rb")
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        offset = 0
+        while next_boundary < len(boundaries) and boundaries[next_boundary] <= position + len(chunk):
+            boundary = boundaries[next_boundary]
+            hasher.update(chunk[offset:boundary - position])
+            if boundary > position:
+                last_byte = chunk[boundary - position - 1:boundary - position]
+            offset = boundary - position
+            prefixes[boundary] = (hasher.hexdigest(), boundary == 0 or last_byte == b"\n")
+            next_boundary += 1
+        hasher.update(chunk[offset:])
+        position += len(chunk)
+        last_byte = chunk[-1:]
+    file.close()
+    while next_boundary < len(boundaries) and boundaries[next_boundary] <= position:
+        prefixes[boundaries[next_boundary]] = (hasher.hexdigest(), last_byte == b"\n")
+        next_boundary += 1
+    return position, hasher.hexdigest(), prefixes
+
+
+def build_topk_index_from(file_name, index=None, start=0):
+    """
+    this function adds the users of the given file from byte offset start onwards to a TopkIndex. A user that is
+    already in the index has their time spent updated, so if a user appears more than once the last line wins.
+    :param file_name:
+    :param index: the TopkIndex to add to, or None for a new one
+    :param start: byte offset of the first line to read
+    :return: the TopkIndex
+    :time complexity: O(n log N) where n is the number of lines read and N is the number of users in the index, or
+    O(n) for a new index
+    :space complexity: O(n) where n is the number of lines read
+    """
+    if index is None:
+        latest = {}
+        for user_id, time_spent in read_in_data_stream(file_name, start):
+            latest[user_id] = time_spent
+        return TopkIndex([None] + list(latest.items()))
+    for user_id, time_spent in read_in_data_stream(file_name, start):
+        if user_id in index:
+            index.update(user_id, time_spent)
+        else:
+            index.insert(user_id, time_spent)
+    return index
+
+
+def build_buddy_table_from(file_name, table=None, start=0):
+    """
+    this function adds the users of the given file from byte offset start onwards to a dictionary of canonical tuples
+    of movies to the list of user ids that like exactly those movies, in the order they were read in.
+    :param file_name:
+    :param table: the dictionary to add to, or None for a new one
+    :param start: byte offset of the first line to read
+    :return: the dictionary
+    :time complexity: O(nK log K) where n is the number of lines read and K is the maximum number of movies liked by a
+    user
+    :space complexity: O(nK) where n is the number of lines read and K is the maximum number of movies liked by a user
+    """
+    if table is None:
+        table = {}
+    for user_id, movies in read_in_data_canonical(file_name, start):
+        if movies in table:
+            table[movies].append(user_id)
+        else:
+            table[movies] = [user_id]
+    return table
+
+
+class ResultCache:
+    """
+    a cache on disk of the TopkIndex built from a timeSpent file and the buddy table built from a favoriteMovies file.
+    Each entry is keyed by the SHA-256 fingerprint of the contents it was built from, not by the file name. If a file
+    has the same contents as an entry, the entry is loaded. If a file starts with the contents of an entry, the file is
+    treated as appended to, and only the new lines are added to the entry, which is then stored as a new entry. Entries
+    are evicted least recently used first when their total size is more than max_bytes.
+    There is no separate index: each entry is a file named after its kind, the size of the contents and their
+    fingerprint, its modification time is when it was last used, and the entries are listed from the directory every
+    time they are needed. Several processes can share the cache directory, since each entry is written to a temporary
+    file and renamed into place, and an entry removed by another process is treated as missing.
+    Entries are stored with pickle, and loading a pickle can run any code, so the cache directory has to be trusted:
+    only use a directory that nobody else can write to. By default it is default_cache_dir, which is created readable
+    and writable only by the user.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=256 << 20):
+        """
+        this function opens the cache in the given directory, creating it if needed.
+        :param cache_dir: a directory only the user can write to, or None for default_cache_dir
+        :param max_bytes: largest total size of the entries
+        """
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.last_status = None
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        self.entries = {}
+
+    def get_topk_index(self, file_name):
+        """
+        this function returns the TopkIndex of the users in the given timeSpent file, from the cache if possible.
+        :param file_name:
+        :return: the TopkIndex
+        :time complexity: O(B) to fingerprint the file, where B is the size of the file, plus the time to load the
+        entry and add any new lines, or to build the index on a miss
+        :space complexity: O(N) where N is the number of users
+        """
+        return self.lookup("topk", file_name, build_topk_index_from)
+
+    def get_buddy_table(self, file_name):
+        """
+        this function returns the dictionary of canonical tuples of movies to user ids of the users in the given
+        favoriteMovies file, from the cache if possible.
+        :param file_name:
+        :return: the dictionary
+        :time complexity: O(B) to fingerprint the file, where B is the size of the file, plus the time to load the
+        entry and add any new lines, or to build the dictionary on a miss
+        :space complexity: O(UK) where U is the number of users and K is the maximum number of movies liked by a user
+        """
+        return self.lookup("buddies", file_name, build_buddy_table_from)
+
+    def get_buddy_groups(self, file_name):
+        """
+        this function returns the groups of users in the given favoriteMovies file that like exactly the same movies,
+        in the same order as buddies.group_movie_buddies_hash.
+        :param file_name:
+        :return: list of (tuple of sorted movie names, list of user ids)
+        :time complexity: see get_buddy_table, plus O(UCK + G log G) where U is the number of users, C is the maximum
+        number of characters for any movie, K is the maximum number of movies liked by a user, and G is the number of
+        groups
+        :space complexity: O(UK) where U is the number of users and K is the maximum number of movies liked by a user
+        """
+        table = self.get_buddy_table(file_name)
+        users = ((user_id, movies) for movies in table for user_id in table[movies])
+        return group_movie_buddies_hash(users)
+
+    def lookup(self, kind, file_name, build):
+        """
+        this function finds the entry of the given kind for the file's contents. An entry with the same fingerprint is
+        loaded as it is. Otherwise the largest entry whose contents are a prefix of the file, ending at the end of a
+        line, is loaded and the lines after it are added with build. If there is no such entry, build reads the whole
+        file. last_status is set to "hit", "append" or "miss".
+        :param kind: "topk" or "buddies"
+        :param file_name:
+        :param build: function of (file name, cached value or None, start offset) that returns the new value
+        :return: the value for the file's contents
+        :time complexity: O(B + E log E) where B is the size of the file and E is the number of entries, plus the time
+        to load the entry or build the value
+        :space complexity: O(E) where E is the number of entries, plus the size of the value
+        """
+        self.scan()
+        candidates = []
+        for name in self.entries:
+            if self.entries[name]["kind"] == kind:
+                candidates.append(name)
+        sizes = [self.entries[name]["size"] for name in candidates]
+        size, fingerprint, prefixes = fingerprint_prefixes(file_name, sizes)
+        best = None
+        for name in candidates:
+            entry = self.entries[name]
+            if entry["size"] == size and entry["fingerprint"] == fingerprint:
+                best = name
+                break
+            if entry["size"] < size and prefixes.get(entry["size"]) == (entry["fingerprint"], True):
+                if best is None or entry["size"] > self.entries[best]["size"]:
+                    best = name
+        value = None
+        if best is not None:
+            value = self.load(best)
+        if value is not None and self.entries[best]["size"] == size:
+            self.last_status = "hit"
+            self.touch(best)
+            return value
+        if value is not None:
+            self.last_status = "append"
+            value = build(file_name, value, self.entries[best]["size"])
+        else:
+            self.last_status = "miss"
+            value = build(file_name, None, 0)
+        self.store(kind, size, fingerprint, value)
+        return value
+
+    def scan(self):
+        """
+        this function lists the entries in the cache directory, with the kind, size and fingerprint from each file name
+        and the last time it was used and its size in bytes from the file. Files that are not entries are skipped.
+        :return: none
+        :time complexity: O(F) where F is the number of files in the cache directory
+        :space complexity: O(E) where E is the number of entries
+        """
+        self.entries = {}
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pickle"):
+                continue
+            parts = name[:-len(".pickle")].split("-")
+            if len(parts) != 3 or parts[0] not in ("topk", "buddies") or not parts[1].isdigit():
+                continue
+            try:
+                status = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            self.entries[name] = {"kind": parts[0], "size": int(parts[1]), "fingerprint": parts[2],
+                                  "last_used": status.st_mtime, "bytes": status.st_size}
+
+    def load(self, name):
+        """
+        this function reads in the value of an entry, removing the entry if its file is unreadable or corrupt.
+        :param name: entry name
+        :return: the value, or None if it could not be read
+        :time complexity: O(V) where V is the size of the value
+        :space complexity: O(V) where V is the size of the value
+        """
+        try:
+            file = open(os.path.join(self.cache_dir, name), "rb")
+            try:
+                return pickle.load(file)
+            finally:
+                file.close()
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError, ImportError, IndexError,
+                TypeError, KeyError):
+            self.remove(name)
+            return None
+
+    def touch(self, name):
+        """
+        this function marks an entry as the most recently used by setting its modification time to now, then calls evict
+        in case max_bytes is smaller than when the entries were stored.
+        :param name: entry name
+        :return: none
+        :time complexity: O(F + E log E) where F is the number of files in the cache directory and E is the number of
+        entries
+        :space complexity: O(E) where E is the number of entries
+        """
+        try:
+            os.utime(os.path.join(self.cache_dir, name))
+        except FileNotFoundError:
+            pass
+        self.evict()
+
+    def store(self, kind, size, fingerprint, value):
+        """
+        this function writes a value to a new entry and then calls evict.
+        :param kind: "topk" or "buddies"
+        :param size: size of the contents the value was built from
+        :param fingerprint: fingerprint of the contents the value was built from
+        :param value: the value
+        :return: none
+        :time complexity: O(V + F + E log E) where V is the size of the value, F is the number of files in the cache
+        directory and E is the number of entries
+        :space complexity: O(V + E) where V is the size of the value and E is the number of entries
+        """
+        name = "{}-{}-{}.pickle".format(kind, size, fingerprint)
+        descriptor, temp_name = tempfile.mkstemp(dir=self.cache_dir)
+        file = os.fdopen(descriptor, "wb")
+        pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.close()
+        os.replace(temp_name, os.path.join(self.cache_dir, name))
+        self.evict()
+
+    def evict(self):
+        """
+        this function lists the entries again, including those stored by other processes, and removes the least
+        recently used entries until their total size is at most max_bytes. An entry larger than max_bytes is removed
+        even if it was just used.
+        :return: none
+        :time complexity: O(F + E log E) where F is the number of files in the cache directory and E is the number of
+        entries
+        :space complexity: O(E) where E is the number of entries
+        """
+        self.scan()
+        total = 0
+        for entry_name in self.entries:
+            total += self.entries[entry_name]["bytes"]
+        for entry_name in sorted(self.entries, key=lambda entry_name: self.entries[entry_name]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self.entries[entry_name]["bytes"]
+            self.remove(entry_name)
+
+    def remove(self, name):
+        """
+        this function deletes an entry and its file, unless another process has already deleted it.
+        :param name: entry name
+        :return: none
+        :time complexity: O(1) constant time
+        :space complexity: O(1) constant space
+        """
+        self.entries.pop(name, None)
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except FileNotFoundError:
+            pass
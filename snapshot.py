@@ -0,0 +1,118 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from topk import get_topk_from_stream, read_in_data_stream
+
+# a snapshot file starts with a 32 byte header of the magic bytes, the format version, the number of users, and the size
+# and modification time in nanoseconds of the text file it was written from, followed by a column of N little-endian
+# int64 user ids and a column of N little-endian int64 times spent.
+SNAPSHOT_MAGIC = b"TSPT"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("<4sIQQq")
+
+
+def write_snapshot(text_file_name, snapshot_file_name):
+    """
+    this function converts a text file of id:time lines into a snapshot file. The ids and times are collected into two
+    int64 arrays, which take 16 bytes per user instead of a tuple of two Python ints, and are then written out after the
+    header. The size and modification time of the text file are recorded in the header so that is_snapshot_current can
+    tell if the text file has changed since.
+    :param text_file_name:
+    :param snapshot_file_name:
+    :return: the number of users written
+    :time complexity: O(N) where N is the number of users
+    :space complexity: O(N) where N is the number of users
+    """
+    source = os.stat(text_file_name)
+    user_ids = array("q")
+    time_spent = array("q")
+    for user_data in read_in_data_stream(text_file_name):
+        user_ids.append(user_data[0])
+        time_spent.append(user_data[1])
+    if sys.byteorder != "little":
+        user_ids.byteswap()
+        time_spent.byteswap()
+    file = open(snapshot_file_name, "wb")
+    file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(user_ids), source.st_size,
+                                    source.st_mtime_ns))
+    user_ids.tofile(file)
+    time_spent.tofile(file)
+    file.close()
+    return len(user_ids)
+
+
+def open_snapshot(snapshot_file_name):
+    """
+    this function memory maps a snapshot file and returns the two columns as int64 memoryviews over the mapping, so no
+    data is copied or parsed until it is read. The caller should release both memoryviews before closing the mapping.
+    :param snapshot_file_name:
+    :raises: ValueError if the file is not a snapshot file, or if this machine is not little-endian
+    :return: a tuple of (mapping, user ids, time spent)
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    if sys.byteorder != "little":
+        raise ValueError("snapshot files can only be mapped on little-endian machines")
+    file = open(snapshot_file_name, "rb")
+    mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    file.close()
+    if len(mapping) < SNAPSHOT_HEADER.size:
+        mapping.close()
+        raise ValueError("{} is not a snapshot file".format(snapshot_file_name))
+    magic, version, count = SNAPSHOT_HEADER.unpack_from(mapping, 0)[:3]
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or len(mapping) != SNAPSHOT_HEADER.size + 16 * count:
+        mapping.close()
+        raise ValueError("{} is not a snapshot file".format(snapshot_file_name))
+    columns = memoryview(mapping)[SNAPSHOT_HEADER.size:].cast("q")
+    user_ids = columns[:count]
+    time_spent = columns[count:]
+    columns.release()
+    return mapping, user_ids, time_spent
+
+
+def is_snapshot_current(snapshot_file_name, text_file_name):
+    """
+    this function checks if a snapshot file exists and was written from the current contents of the text file, by
+    comparing the size and modification time in nanoseconds recorded in its header with the text file's. Both have to
+    be equal, so a rewrite that changes the size is noticed even if the modification time did not change.
+    :param snapshot_file_name:
+    :param text_file_name:
+    :return: True if the snapshot can be used, False if it is missing, not a snapshot file, or out of date
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    if not os.path.exists(snapshot_file_name):
+        return False
+    file = open(snapshot_file_name, "rb")
+    header = file.read(SNAPSHOT_HEADER.size)
+    file.close()
+    if len(header) < SNAPSHOT_HEADER.size:
+        return False
+    magic, version, count, source_size, source_mtime = SNAPSHOT_HEADER.unpack(header)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        return False
+    source = os.stat(text_file_name)
+    return source_size == source.st_size and source_mtime == source.st_mtime_ns
+
+
+def get_topk_snapshot(snapshot_file_name, k):
+    """
+    this function finds the top-k users straight from a memory mapped snapshot file by passing the two columns to
+    topk.get_topk_from_stream, so a list of N tuples is never built.
+    :param snapshot_file_name:
+    :param k: number of users to return
+    :raises: ValueError if 1 > k > N, where N is the number of users.
+    :return: list of the top-k (user id, time spent) tuples, highest ranked first
+    :time complexity: O(N log k) where N is the number of users
+    :space complexity: O(k)
+    """
+    mapping, user_ids, time_spent = open_snapshot(snapshot_file_name)
+    try:
+        return get_topk_from_stream(zip(user_ids, time_spent), k)
+    finally:
+        user_ids.release()
+        time_spent.release()
+        mapping.close()
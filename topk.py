@@ -1,3 +1,5 @@
+import os
+import sys
 
 
 def read_in_data(file_name):
@@ -127,23 +129,326 @@ def get_max(my_heap, count, a):
     sift_down(my_heap, 1, count)
 
 
-def get_topk_users():
+def sift_up(a_list, child):
     """
-    this function calls the above functions. It calls the get_max function k times, top get the top-k users of time
-    spent on the app, where k is the number given by the user.
+    this function swaps the node at the given position with its parent while the node is larger than its parent, or has
+    the same time spent on the app and a smaller user id than its parent.
+    :param a_list: the list that stores the heap
+    :param child: array position of the node
+    :return: none
+    :time complexity: O(log N) where N is the size of the heap
+    :space complexity: O(1) constant space
+    """
+    while child > 1:
+        parent = child // 2
+        if a_list[parent][1] > a_list[child][1]:
+            return
+        elif (a_list[parent][1] == a_list[child][1]) and (a_list[parent][0] < a_list[child][0]):
+            return
+        swap(a_list, parent, child)
+        child = parent
+
+
+def get_topk_from_heap(my_heap, count, k):
+    """
+    this function gets the top-k users from a max heap built by heapify without modifying it. Since every node is larger
+    than its children, the next largest node is always a child of a node that has already been taken. The function
+    keeps a frontier max heap of (user id, time spent, position) tuples, starting with the root. It takes the largest
+    node from the frontier k times and adds that node's children to the frontier, so the frontier never has more than
+    k + 1 nodes. sift_down and sift_up only compare the first two elements, so the frontier uses the same ordering.
+    :param my_heap: a max heap built by heapify
+    :param count: number of nodes in the heap
+    :param k: number of users to return
     :raises: ValueError if 1 > k > N, where N is the number of users.
+    :return: list of the top-k (user id, time spent) tuples, highest ranked first
+    :time complexity: O(k log k)
+    :space complexity: O(k)
+    """
+    if not 1 <= k <= count:
+        raise ValueError("invalid input for k")
+    root = my_heap[1]
+    frontier = [None, (root[0], root[1], 1)]
+    frontier_count = 1
+    top_users = []
+    for _ in range(k):
+        largest = frontier[1]
+        top_users.append(my_heap[largest[2]])
+        swap(frontier, 1, frontier_count)
+        frontier.pop()
+        frontier_count -= 1
+        sift_down(frontier, 1, frontier_count)
+        child = 2 * largest[2]
+        while child <= count and child <= 2 * largest[2] + 1:
+            user_data = my_heap[child]
+            frontier.append((user_data[0], user_data[1], child))
+            frontier_count += 1
+            sift_up(frontier, frontier_count)
+            child += 1
+    return top_users
+
+
+def ranks_below(a_user, b_user):
+    """
+    this function determines if a_user is ranked below b_user. A user is ranked below another user if they spent less
+    time on the app, or if they spent the same time on the app and have a larger user id. This is the opposite of the
+    ordering used by sift_down and find_largest_child.
+    :param a_user: tuple of (user id, time spent)
+    :param b_user: tuple of (user id, time spent)
+    :return: True if a_user is ranked below b_user, False otherwise
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    if a_user[1] < b_user[1]:
+        return True
+    elif a_user[1] == b_user[1] and a_user[0] > b_user[0]:
+        return True
+    return False
+
+
+def sift_down_min(a_list, root, count):
+    """
+    this function is the min heap version of sift_down. It swaps the root with its smallest child until the parent is
+    ranked below both of its children, where the ranking is given by ranks_below.
+    :param a_list: the list of elements in which we are trying to heapify
+    :param root: the root of the heap structure
+    :param count: size of the heap
     :return: none
-    :time complexity: O(N log k). Since k <= N, a tighter upper bound time complexity is O(k log N)
+    :time complexity: O(log k) where k is the size of the heap
+    :space complexity: O(1) constant space
+    """
+    parent = root
+    while 2*parent <= count:
+        left_child = 2*parent
+        smallest_child = find_smallest_child(a_list, parent, left_child, count)
+        if ranks_below(a_list[parent], a_list[smallest_child]):
+            return
+        swap(a_list, parent, smallest_child)
+        parent = smallest_child
+
+
+def find_smallest_child(a_heap, parent, left_child, count):
+    """
+    this function is the min heap version of find_largest_child. If the parent has no right child, the smallest child is
+    the left child. Otherwise the smallest child is whichever child is ranked below the other, where the ranking is
+    given by ranks_below.
+    :param a_heap: the array that stores the heap
+    :param parent: array position of the parent
+    :param left_child: array position of the left child
+    :param count: number of nodes in the heap
+    :return: the smallest child of the parent
+    :time complexity: O(1) constant time
+    :space complexity: O(1) constant space
+    """
+    if 2 * parent + 1 <= count:
+        right_child = 2 * parent + 1
+        if ranks_below(a_heap[right_child], a_heap[left_child]):
+            return right_child
+    return left_child
+
+
+def read_in_data_stream(file_name, start=0):
+    """
+    this function reads in the data from a given file one line at a time, instead of into a list like read_in_data.
+    :param file_name:
+    :param start: byte offset of the first line to read
+    :return: a generator of (user id, time spent) tuples
+    :time complexity: O(N) where N is the number of users
     :space complexity: O(1) constant space
     """
-    data_list = read_in_data("timeSpent.txt")
-    data_heap = heapify(data_list)
-    count = len(data_heap)
-    k = int(input("Enter the value of k: "))
-    if not 1 <= k <= count - 1:
+    file = open(file_name)
+    if start:
+        file.seek(start)
+    for line in file:
+        line = line.strip()
+        line = line.split(":")
+        user_id = int(line[0])
+        time_spent = int(line[1])
+        yield (user_id, time_spent)
+    file.close()
+
+
+def get_topk_bounded(file_name, k):
+    """
+    this function finds the top-k users without loading the whole file by passing read_in_data_stream to
+    get_topk_from_stream.
+    :param file_name:
+    :param k: number of users to return
+    :raises: ValueError if 1 > k > N, where N is the number of users.
+    :return: list of the top-k (user id, time spent) tuples, highest ranked first
+    :time complexity: O(N log k) where N is the number of users
+    :space complexity: O(k)
+    """
+    return get_topk_from_stream(read_in_data_stream(file_name), k)
+
+
+def get_topk_from_stream(users, k, partial=False):
+    """
+    this function finds the top-k users of an iterable of (user id, time spent) tuples in one pass. It keeps a min heap
+    of size k, where the root is the lowest ranked user of the current top-k. A new user only replaces the root if the
+    root is ranked below them. Once every user has been seen, the heap is heap sorted in place so that the users are
+    ordered from the highest ranked to the lowest ranked, with the same tie break as find_largest_child.
+    :param users: iterable of (user id, time spent) tuples
+    :param k: number of users to return
+    :param partial: if True, return every user when there are fewer than k users instead of raising
+    :raises: ValueError if 1 > k > N, where N is the number of users.
+    :return: list of the top-k (user id, time spent) tuples, highest ranked first
+    :time complexity: O(N log k) where N is the number of users
+    :space complexity: O(k)
+    """
+    if k < 1:
         raise ValueError("invalid input for k")
-    for x in range(1, k + 1):
-        get_max(data_heap, count-x, x)
+    min_heap = [None]
+    count = 0
+    for user_data in users:
+        if count < k:
+            min_heap.append(user_data)
+            count += 1
+            if count == k:
+                heapify_min(min_heap)
+        elif ranks_below(min_heap[1], user_data):
+            min_heap[1] = user_data
+            sift_down_min(min_heap, 1, count)
+    if count < k:
+        if not partial:
+            raise ValueError("invalid input for k")
+        heapify_min(min_heap)
+    while count > 1:
+        swap(min_heap, 1, count)
+        count -= 1
+        sift_down_min(min_heap, 1, count)
+    return min_heap[1:]
+
+
+def heapify_min(my_list):
+    """
+    this function heapifys the list into a min heap using sift_down_min, in the same way heapify builds a max heap.
+    :param my_list:
+    :return: a min heap
+    :time complexity: O(k) where k is the size of the list
+    :space complexity: O(1) constant space
+    """
+    count = len(my_list) - 1
+    sub_root = count // 2
+    while sub_root >= 1:
+        sift_down_min(my_list, sub_root, count)
+        sub_root -= 1
+    return my_list
+
+
+def find_topk_users(file_name, k, mode="full", shard_stats=None, snapshot_file_name=None):
+    """
+    this function finds the top-k users of the given file without printing them. In "full" mode it heapifys every user
+    and calls get_topk_from_heap. In "bounded" mode it calls get_topk_bounded, which only keeps k users in memory at a
+    time. In "numpy" mode it calls the vectorized functions in topk_numpy, which needs NumPy to be installed. In
+    "snapshot" mode it memory maps the given snapshot file, or by default the file next to the given file with the
+    extension .bin, or .snapshot added if the given file already ends in .bin. The snapshot file is written by
+    snapshot.write_snapshot unless snapshot.is_snapshot_current says it was written from the given file as it is now.
+    If the default snapshot file cannot be written, for example because the directory is read-only, the users are
+    found as in "bounded" mode instead. In "parallel" mode it calls topk_parallel.get_topk_parallel. In "cached" mode
+    it loads the TopkIndex of the file's contents from a result_cache.ResultCache in the user's cache directory, which
+    is built, or brought up to date with only the lines appended since it was stored, if needed. If a user id appears
+    more than once in "cached" mode, the last line wins.
+    :param file_name:
+    :param k: number of users to return
+    :param mode: "full", "bounded", "numpy", "snapshot", "parallel" or "cached"
+    :param shard_stats: list that the per-shard statistics are added to in "parallel" mode, or None
+    :param snapshot_file_name: the snapshot file to use in "snapshot" mode, or None for the default
+    :raises: ValueError if 1 > k > N, where N is the number of users, if the mode is not recognised, or if the snapshot
+    file would be the given file.
+    :return: list of the top-k (user id, time spent) tuples, highest ranked first
+    :time complexity: O(N + k log k) in "full" mode, O(N log k) in "bounded", "snapshot" and "parallel" mode, where N
+    is the number of users
+    :space complexity: O(N) in "full" and "numpy" mode, O(k) in "bounded" and "snapshot" mode
+    """
+    if mode == "full":
+        data_heap = heapify(read_in_data(file_name))
+        return get_topk_from_heap(data_heap, len(data_heap) - 1, k)
+    elif mode == "bounded":
+        return get_topk_bounded(file_name, k)
+    elif mode == "parallel":
+        from topk_parallel import get_topk_parallel
+        top_users, stats = get_topk_parallel(file_name, k)
+        if shard_stats is not None:
+            shard_stats.extend(stats)
+        return top_users
+    elif mode == "snapshot":
+        from snapshot import get_topk_snapshot, is_snapshot_current, write_snapshot
+        default = snapshot_file_name is None
+        if default:
+            snapshot_file_name = os.path.splitext(file_name)[0] + ".bin"
+            if os.path.abspath(snapshot_file_name) == os.path.abspath(file_name):
+                snapshot_file_name = file_name + ".snapshot"
+        elif os.path.abspath(snapshot_file_name) == os.path.abspath(file_name):
+            raise ValueError("snapshot file cannot be the input file")
+        if not is_snapshot_current(snapshot_file_name, file_name):
+            try:
+                write_snapshot(file_name, snapshot_file_name)
+            except OSError:
+                if not default:
+                    raise
+                return get_topk_bounded(file_name, k)
+        return get_topk_snapshot(snapshot_file_name, k)
+    elif mode == "numpy":
+        from topk_numpy import read_in_data_numpy, get_topk_numpy
+        user_ids, time_spent = read_in_data_numpy(file_name)
+        return get_topk_numpy(user_ids, time_spent, k)
+    elif mode == "cached":
+        from result_cache import ResultCache
+        return ResultCache().get_topk_index(file_name).top(k)
+    raise ValueError("invalid mode")
+
+
+def iter_topk_users(file_name, k, mode="full", snapshot_file_name=None):
+    """
+    this function finds the top-k users of the given file with find_topk_users and returns them as records.
+    :param file_name:
+    :param k: number of users to return
+    :param mode: see find_topk_users
+    :param snapshot_file_name: see find_topk_users
+    :raises: ValueError if 1 > k > N, where N is the number of users, or if the mode is not recognised.
+    :return: a generator of dictionaries with the keys "rank", "user_id" and "time_spent", highest ranked first
+    :time complexity: see find_topk_users
+    :space complexity: see find_topk_users
+    """
+    top_users = find_topk_users(file_name, k, mode, snapshot_file_name=snapshot_file_name)
+    for x in range(len(top_users)):
+        yield {"rank": x + 1, "user_id": top_users[x][0], "time_spent": top_users[x][1]}
+
+
+def get_topk_users(mode="full"):
+    """
+    this function calls the above functions. In "full" mode it heapifys every user and calls the get_max function k
+    times, top get the top-k users of time spent on the app, where k is the number given by the user. In the other
+    modes it calls find_topk_users and prints the users in the same format as get_max. In "parallel" mode the time
+    taken by each shard is printed to stderr.
+    :param mode: "full", "bounded", "numpy", "snapshot", "parallel" or "cached"
+    :raises: ValueError if 1 > k > N, where N is the number of users, or if the mode is not recognised.
+    :return: none
+    :time complexity: O(N log k). Since k <= N, a tighter upper bound time complexity is O(k log N) in "full" mode
+    :space complexity: O(N) in "full" and "numpy" mode, O(k) in "bounded" and "snapshot" mode
+    """
+    if mode == "full":
+        data_list = read_in_data("timeSpent.txt")
+        data_heap = heapify(data_list)
+        count = len(data_heap)
+        k = int(input("Enter the value of k: "))
+        if not 1 <= k <= count - 1:
+            raise ValueError("invalid input for k")
+        for x in range(1, k + 1):
+            get_max(data_heap, count-x, x)
+    elif mode == "bounded" or mode == "numpy" or mode == "snapshot" or mode == "parallel" or \
+            mode == "cached":
+        k = int(input("Enter the value of k: "))
+        shard_stats = []
+        top_users = find_topk_users("timeSpent.txt", k, mode, shard_stats)
+        for shard in shard_stats:
+            print("Shard {}: bytes {}-{}, {} users, {:.4f}s".format(
+                shard["shard"], shard["start"], shard["end"], shard["users"], shard["seconds"]), file=sys.stderr)
+        for x in range(1, k + 1):
+            user_data = top_users[x - 1]
+            print("#{}: User ID: {} Time spent: {}".format(x, user_data[0], user_data[1]))
+    else:
+        raise ValueError("invalid mode")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,186 @@
+from topk import get_topk_from_heap, ranks_below, read_in_data
+
+
+class TopkIndex:
+    """
+    an indexed max heap of (user id, time spent) tuples that is kept up to date as users' time spent changes. It uses
+    the same array layout as topk.heapify, where the root is at position 1, and the same ordering as sift_down and
+    find_largest_child. A dictionary maps each user id to their position in the heap so that a user can be found,
+    updated or removed in O(log N) time without rebuilding the heap.
+    """
+
+    def __init__(self, data_list=None):
+        """
+        this function builds the index from a list of (user id, time spent) tuples, such as the list returned by
+        topk.read_in_data, by heapifying it and recording the position of each user.
+        :param data_list: list of (user id, time spent) tuples where the first element is None
+        :raises: ValueError if a user id appears more than once
+        :time complexity: O(N) where N is the number of users
+        :space complexity: O(N) where N is the number of users
+        """
+        if data_list is None:
+            data_list = [None]
+        self.heap = list(data_list)
+        self.count = len(self.heap) - 1
+        self.position = {}
+        for i in range(1, self.count + 1):
+            user_id = self.heap[i][0]
+            if user_id in self.position:
+                raise ValueError("duplicate user id {}".format(user_id))
+            self.position[user_id] = i
+        sub_root = self.count // 2
+        while sub_root >= 1:
+            self._sift_down(sub_root)
+            sub_root -= 1
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, user_id):
+        return user_id in self.position
+
+    def get(self, user_id):
+        """
+        this function returns the time spent of the given user.
+        :param user_id:
+        :raises: KeyError if the user is not in the index
+        :return: the user's time spent
+        :time complexity: O(1) constant time
+        :space complexity: O(1) constant space
+        """
+        return self.heap[self.position[user_id]][1]
+
+    def insert(self, user_id, time_spent):
+        """
+        this function adds a new user to the end of the heap and sifts them up to their position.
+        :param user_id:
+        :param time_spent:
+        :raises: ValueError if the user is already in the index
+        :return: none
+        :time complexity: O(log N) where N is the number of users
+        :space complexity: O(1) constant space
+        """
+        if user_id in self.position:
+            raise ValueError("duplicate user id {}".format(user_id))
+        self.heap.append((user_id, time_spent))
+        self.count += 1
+        self.position[user_id] = self.count
+        self._sift_up(self.count)
+
+    def remove(self, user_id):
+        """
+        this function removes a user by swapping them with the last node of the heap, shrinking the heap by one, and
+        then restoring the heap property at the position the last node was moved to.
+        :param user_id:
+        :raises: KeyError if the user is not in the index
+        :return: the removed user's time spent
+        :time complexity: O(log N) where N is the number of users
+        :space complexity: O(1) constant space
+        """
+        i = self.position[user_id]
+        removed = self.heap[i]
+        self._swap(i, self.count)
+        self.heap.pop()
+        self.count -= 1
+        del self.position[user_id]
+        if i <= self.count:
+            self._restore(i)
+        return removed[1]
+
+    def update(self, user_id, new_time):
+        """
+        this function changes a user's time spent and then sifts them up or down depending on whether their ranking went
+        up or down.
+        :param user_id:
+        :param new_time:
+        :raises: KeyError if the user is not in the index
+        :return: none
+        :time complexity: O(log N) where N is the number of users
+        :space complexity: O(1) constant space
+        """
+        i = self.position[user_id]
+        self.heap[i] = (user_id, new_time)
+        self._restore(i)
+
+    def top(self, k):
+        """
+        this function returns the top-k users without modifying the index by calling topk.get_topk_from_heap on the
+        index's heap.
+        :param k:
+        :raises: ValueError if 1 > k > N, where N is the number of users.
+        :return: list of the top-k (user id, time spent) tuples, highest ranked first
+        :time complexity: O(k log k)
+        :space complexity: O(k)
+        """
+        return get_topk_from_heap(self.heap, self.count, k)
+
+    def _restore(self, i):
+        """
+        this function moves the node at position i up if it is ranked above its parent, and otherwise down.
+        :param i: array position of the node
+        :return: none
+        :time complexity: O(log N) where N is the number of users
+        :space complexity: O(1) constant space
+        """
+        if i > 1 and ranks_below(self.heap[i // 2], self.heap[i]):
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
+
+    def _sift_up(self, i):
+        """
+        this function swaps the node at position i with its parent while it is ranked above its parent.
+        :param i: array position of the node
+        :return: none
+        :time complexity: O(log N) where N is the number of users
+        :space complexity: O(1) constant space
+        """
+        while i > 1 and ranks_below(self.heap[i // 2], self.heap[i]):
+            self._swap(i, i // 2)
+            i = i // 2
+
+    def _sift_down(self, root):
+        """
+        this function is topk.sift_down on the index's heap. It swaps the parent with its largest child until the parent
+        is ranked above both of its children.
+        :param root: array position of the node
+        :return: none
+        :time complexity: O(log N) where N is the number of users
+        :space complexity: O(1) constant space
+        """
+        a_list = self.heap
+        count = self.count
+        parent = root
+        while 2*parent <= count:
+            largest_child = 2*parent
+            if largest_child + 1 <= count and ranks_below(a_list[largest_child], a_list[largest_child + 1]):
+                largest_child += 1
+            if ranks_below(a_list[largest_child], a_list[parent]):
+                return
+            self._swap(parent, largest_child)
+            parent = largest_child
+
+    def _swap(self, i, j):
+        """
+        this function swaps the nodes at positions i and j and updates their recorded positions.
+        :param i: position i
+        :param j: position j
+        :return: none
+        :time complexity: O(1) constant time
+        :space complexity: O(1) constant space
+        """
+        heap = self.heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self.position[heap[i][0]] = i
+        self.position[heap[j][0]] = j
+
+
+def build_topk_index(file_name):
+    """
+    this function reads in the data from the given file and builds a TopkIndex from it.
+    :param file_name:
+    :return: a TopkIndex of every user in the file
+    :time complexity: O(N) where N is the number of users
+    :space complexity: O(N) where N is the number of users
+    """
+    return TopkIndex(read_in_data(file_name))
@@ -0,0 +1,93 @@
+import numpy as np
+
+# 10 ** i for every number of digits that fits in an int64 without overflowing
+POWERS_OF_TEN = 10 ** np.arange(18, dtype=np.int64)
+# the tokens of a line: a run of digits (0), ":" (1), a run of digits (0) and a newline (2)
+LINE_TOKENS = np.array([0, 1, 0, 2], dtype=np.int8)
+
+
+def read_in_data_numpy(file_name):
+    """
+    this function reads in the data from a given file into two int64 arrays of size N where N is the number of users,
+    one for the user ids and one for the time spent on the app. Instead of parsing each line in Python, the whole file
+    is read as bytes and every run of digits is turned into a number at once. Each digit is multiplied by the power of
+    ten given by its distance from the end of its run, and the products of each run are summed with reduceat. A run
+    straight after a "-" is negated. Like int in read_in_data, every line has to be an id and a time separated by one
+    ":", each with an optional sign and surrounding whitespace, and anything else raises ValueError.
+    :param file_name:
+    :raises: ValueError if a line is not of the form id:time, or a number has more than 18 digits
+    :return: a tuple of (user ids, time spent) arrays
+    :time complexity: O(B) where B is the number of bytes in the file
+    :space complexity: O(B) where B is the number of bytes in the file
+    """
+    file = open(file_name, "rb")
+    raw = np.frombuffer(file.read(), dtype=np.uint8)
+    file.close()
+    if len(raw) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    is_digit = (raw >= 48) & (raw <= 57)
+    is_sign = (raw == 43) | (raw == 45)
+    is_colon = raw == 58
+    is_newline = raw == 10
+    is_space = (raw == 32) | ((raw >= 9) & (raw <= 13) & ~is_newline)
+    if not np.all(is_digit | is_sign | is_colon | is_newline | is_space):
+        raise ValueError("invalid data in {}".format(file_name))
+    # a sign has to be followed by a digit, and be at the start of a line or after ":" or whitespace
+    signs = np.flatnonzero(is_sign)
+    if len(signs) > 0:
+        after = signs + 1
+        if after[-1] >= len(raw) or not np.all(is_digit[after]):
+            raise ValueError("invalid data in {}".format(file_name))
+        before = signs[signs > 0] - 1
+        if not np.all(is_newline[before] | is_colon[before] | is_space[before]):
+            raise ValueError("invalid data in {}".format(file_name))
+
+    # the runs of digits, ":" and newlines of the file have to come in the order run, ":", run, newline on every line
+    is_start = is_digit.copy()
+    is_start[1:] &= ~is_digit[:-1]
+    tokens = (is_colon.view(np.int8) + 2 * is_newline.view(np.int8))[is_start | is_colon | is_newline]
+    expected = np.tile(LINE_TOKENS, (len(tokens) + 3) // 4)[:len(tokens)]
+    if len(tokens) == 0 or len(tokens) % 4 not in (0, 3) or not np.array_equal(tokens, expected):
+        raise ValueError("invalid data in {}".format(file_name))
+
+    positions = np.flatnonzero(is_digit)
+    starts = np.flatnonzero(is_start[positions])
+    ends = np.append(starts[1:], len(positions)) - 1
+    if np.any(ends - starts >= 18):
+        raise ValueError("invalid data in {}".format(file_name))
+    digits = raw[positions].astype(np.int64) - 48
+    run_of_digit = np.cumsum(is_start[positions]) - 1
+    exponents = ends[run_of_digit] - np.arange(len(positions))
+    values = np.add.reduceat(digits * POWERS_OF_TEN[exponents], starts)
+    first_digits = positions[starts]
+    negative = np.zeros(len(values), dtype=bool)
+    has_before = first_digits > 0
+    negative[has_before] = raw[first_digits[has_before] - 1] == 45
+    values[negative] = -values[negative]
+    return values[0::2], values[1::2]
+
+
+def get_topk_numpy(user_ids, time_spent, k):
+    """
+    this function finds the top-k users with argpartition. argpartition finds the k largest times in linear time, but
+    users who have the same time as the k-th largest time may be left out at random. So every user with at least that
+    time is taken as a candidate, and the candidates are sorted with a stable lexsort on (-time spent, user id), which
+    is the same ordering as sift_down and find_largest_child.
+    :param user_ids: int64 array of user ids
+    :param time_spent: int64 array of time spent
+    :param k: number of users to return
+    :raises: ValueError if 1 > k > N, where N is the number of users.
+    :return: list of the top-k (user id, time spent) tuples, highest ranked first
+    :time complexity: O(N + c log c) where N is the number of users and c is the number of candidates, which is k plus
+    the number of users tied with the k-th largest time
+    :space complexity: O(N) where N is the number of users
+    """
+    count = len(user_ids)
+    if not 1 <= k <= count:
+        raise ValueError("invalid input for k")
+    largest = np.argpartition(time_spent, count - k)[count - k:]
+    threshold = time_spent[largest].min()
+    candidates = np.flatnonzero(time_spent >= threshold)
+    order = np.lexsort((user_ids[candidates], -time_spent[candidates]))
+    chosen = candidates[order[:k]]
+    return list(zip(user_ids[chosen].tolist(), time_spent[chosen].tolist()))
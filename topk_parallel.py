@@ -0,0 +1,122 @@
+import os
+import time
+from multiprocessing import Pool
+
+from topk import get_topk_from_stream
+
+
+def find_shard_boundaries(file_name, num_shards):
+    """
+    this function splits a file into at most num_shards byte ranges of roughly equal size. Each boundary is moved
+    forward to the start of the next line, so that every line belongs to exactly one shard.
+    :param file_name:
+    :param num_shards:
+    :return: list of (start, end) byte offsets
+    :time complexity: O(S + L) where S is the number of shards and L is the length of the longest line
+    :space complexity: O(S) where S is the number of shards
+    """
+    file_size = os.path.getsize(file_name)
+    file = open(file_name, "rb")
+    boundaries = [0]
+    for i in range(1, num_shards):
+        offset = file_size * i // num_shards
+        if offset <= boundaries[-1]:
+            continue
+        file.seek(offset - 1)
+        file.readline()
+        offset = file.tell()
+        if offset >= file_size:
+            break
+        if offset > boundaries[-1]:
+            boundaries.append(offset)
+    file.close()
+    boundaries.append(file_size)
+    shards = []
+    for i in range(len(boundaries) - 1):
+        if boundaries[i] < boundaries[i + 1]:
+            shards.append((boundaries[i], boundaries[i + 1]))
+    return shards
+
+
+def read_in_shard(file_name, start, end):
+    """
+    this function reads in the lines between the given byte offsets, which must be at the start of a line.
+    :param file_name:
+    :param start: byte offset of the first line
+    :param end: byte offset just past the last line
+    :return: a generator of (user id, time spent) tuples
+    :time complexity: O(n) where n is the number of users in the shard
+    :space complexity: O(1) constant space
+    """
+    file = open(file_name, "rb")
+    file.seek(start)
+    position = start
+    while position < end:
+        line = file.readline()
+        if not line:
+            break
+        position += len(line)
+        line = line.strip()
+        if not line:
+            continue
+        line = line.split(b":")
+        yield (int(line[0]), int(line[1]))
+    file.close()
+
+
+def get_topk_shard(shard):
+    """
+    this function is run by each worker process. It finds the local top-k users of one shard with
+    topk.get_topk_from_stream and times how long it took.
+    :param shard: tuple of (file name, start, end, k)
+    :return: tuple of (local top-k users, number of users in the shard, seconds taken)
+    :time complexity: O(n log k) where n is the number of users in the shard
+    :space complexity: O(k)
+    """
+    file_name, start, end, k = shard
+    started = time.perf_counter()
+    counted = [0]
+
+    def counting(users):
+        for user_data in users:
+            counted[0] += 1
+            yield user_data
+
+    local_top = get_topk_from_stream(counting(read_in_shard(file_name, start, end)), k, partial=True)
+    return local_top, counted[0], time.perf_counter() - started
+
+
+def get_topk_parallel(file_name, k, processes=None):
+    """
+    this function finds the top-k users with a pool of worker processes. The file is split into one shard per process
+    by find_shard_boundaries, each worker finds the local top-k of its shard, and the local results are merged with
+    topk.get_topk_from_stream. Since every user in the global top-k is in the local top-k of their shard, and both
+    steps use the same tie break as find_largest_child, the result is the same as get_topk_users.
+    :param file_name:
+    :param k: number of users to return
+    :param processes: number of worker processes, defaults to the number of cores
+    :raises: ValueError if 1 > k > N, where N is the number of users.
+    :return: a tuple of (list of the top-k (user id, time spent) tuples, highest ranked first, and a list of per-shard
+    dictionaries with the shard's byte range, number of users and seconds taken)
+    :time complexity: O((N / P) log k + P k log k) where N is the number of users and P is the number of processes
+    :space complexity: O(P k) where P is the number of processes
+    """
+    if k < 1:
+        raise ValueError("invalid input for k")
+    if processes is None:
+        processes = os.cpu_count() or 1
+    shards = find_shard_boundaries(file_name, processes)
+    pool = Pool(processes)
+    try:
+        results = pool.map(get_topk_shard, [(file_name, start, end, k) for (start, end) in shards])
+    finally:
+        pool.close()
+        pool.join()
+    partial_tops = []
+    shard_stats = []
+    for i in range(len(shards)):
+        local_top, num_users, seconds = results[i]
+        partial_tops.extend(local_top)
+        shard_stats.append({"shard": i + 1, "start": shards[i][0], "end": shards[i][1], "users": num_users,
+                            "seconds": seconds})
+    return get_topk_from_stream(partial_tops, k), shard_stats